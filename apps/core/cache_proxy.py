@@ -1,19 +1,24 @@
 """
 Patrón PROXY - Cache del menú para evitar consultas repetitivas a BD
 """
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
 from apps.menu.models import Product, Category
 
+MENU_CACHE_KEY = 'menu:v1'
+
 
 class MenuProxy:
     """
     Proxy que cachea el menú para evitar consultas constantes a BD
-    Implementa Singleton interno para mantener cache único
+    Implementa Singleton interno; el menú se guarda en el cache de Django
+    para compartirlo entre peticiones y procesos
     """
 
     _instance = None
-    _cache = None
-    _cache_timestamp = None
     _cache_duration = timedelta(minutes=15)  # Cache válido por 15 minutos
 
     # Estadísticas internas
@@ -33,28 +38,22 @@ class MenuProxy:
         """
         Obtener menú desde cache o BD (con estadísticas)
         """
-        if force_refresh or self._is_cache_expired():
+        entry = None if force_refresh else cache.get(MENU_CACHE_KEY)
+
+        if entry is None:
             self.increment_cache_miss()
-            self._refresh_cache()
+            entry = self._refresh_cache()
         else:
             self.increment_cache_hit()
 
-        return self._cache
+        return entry['menu']
 
     # ==============================================================
     # UTILIDADES INTERNAS
     # ==============================================================
 
-    def _is_cache_expired(self):
-        """Verificar si el cache expiró"""
-        if self._cache is None or self._cache_timestamp is None:
-            return True
-
-        elapsed = datetime.now() - self._cache_timestamp
-        return elapsed > self._cache_duration
-
     def _refresh_cache(self):
-        """Recargar menú desde BD"""
+        """Recargar menú desde BD y guardarlo en el cache compartido"""
         print("[PROXY] Cargando menú desde base de datos...")
 
         categories = Category.objects.prefetch_related('products').all()
@@ -80,14 +79,14 @@ class MenuProxy:
                 ]
             })
 
-        self._cache = menu_data
-        self._cache_timestamp = datetime.now()
+        entry = {'menu': menu_data, 'timestamp': timezone.now()}
+        cache.set(MENU_CACHE_KEY, entry, int(self._cache_duration.total_seconds()))
         print(f"[PROXY] Cache actualizado: {len(menu_data)} categorías")
+        return entry
 
     def invalidate_cache(self):
         """Invalidar cache manualmente"""
-        self._cache = None
-        self._cache_timestamp = None
+        cache.delete(MENU_CACHE_KEY)
         print("[PROXY] Cache invalidado")
 
     # ==============================================================
@@ -96,13 +95,14 @@ class MenuProxy:
 
     def get_cache_info(self):
         """Obtener información del estado del cache"""
-        if self._cache_timestamp:
-            age = datetime.now() - self._cache_timestamp
+        entry = cache.get(MENU_CACHE_KEY)
+        if entry is not None:
+            age = timezone.now() - entry['timestamp']
             return {
                 'cached': True,
                 'age_seconds': int(age.total_seconds()),
                 'expires_in_seconds': int((self._cache_duration - age).total_seconds()),
-                'items_count': len(self._cache) if self._cache else 0
+                'items_count': len(entry['menu'])
             }
         return {
             'cached': False,
@@ -147,13 +147,12 @@ class MenuProxy:
         Returns:
             Lista de productos que coinciden
         """
-        if self._is_cache_expired():
-            self._refresh_cache()
+        entry = cache.get(MENU_CACHE_KEY) or self._refresh_cache()
 
         results = []
         query_lower = query.lower()
 
-        for category in self._cache:
+        for category in entry['menu']:
             for product in category['products']:
                 if (query_lower in product['name'].lower() or
                         query_lower in product['description'].lower()):
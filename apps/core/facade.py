@@ -4,12 +4,14 @@ Integra todos los patrones y subsistemas
 """
 from datetime import datetime
 
+from django.db.models import Prefetch
+
 # Añadido para mejoras SIN eliminar nada
 from apps.core.service_registry import get_registry
 
 from apps.users.models import User
 from apps.menu.models import Product
-from apps.orders.models import Order
+from apps.orders.models import Order, OrderItem
 from apps.orders.patterns.builder import OrderBuilder, OrderDirector
 from apps.orders.patterns.state import OrderStateManager
 from apps.orders.patterns.command import CommandInvoker, CreateOrderCommand, CancelOrderCommand
@@ -121,7 +123,7 @@ class CafeteriaFacade:
         print(f"\n[FACADE] ========== COMPLETAR ORDEN #{order_id} ==========")
 
         try:
-            order = Order.objects.get(id=order_id)
+            order = Order.objects.select_related('customer', 'mesero').get(id=order_id)
 
             # Template Method
             template = get_order_process_template('ready')
@@ -150,7 +152,7 @@ class CafeteriaFacade:
         print(f"\n[FACADE] ========== ENTREGAR ORDEN #{order_id} ==========")
 
         try:
-            order = Order.objects.get(id=order_id)
+            order = Order.objects.select_related('customer', 'mesero').get(id=order_id)
 
             template = get_order_process_template('delivered')
             result = template.process_order(order)
@@ -178,7 +180,7 @@ class CafeteriaFacade:
         print(f"\n[FACADE] ========== CANCELAR ORDEN #{order_id} ==========")
 
         try:
-            order = Order.objects.get(id=order_id)
+            order = Order.objects.select_related('customer', 'mesero').get(id=order_id)
             user = User.objects.get(id=user_id) if user_id else None
 
             if not OrderStateManager.can_cancel(order):
@@ -216,7 +218,9 @@ class CafeteriaFacade:
         print(f"\n[FACADE] ========== EDITAR ORDEN #{order_id} ==========")
 
         try:
-            order = Order.objects.get(id=order_id)
+            order = Order.objects.select_related('customer', 'mesero').prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+            ).get(id=order_id)
 
             if not OrderStateManager.can_edit(order):
                 return {
@@ -228,7 +232,7 @@ class CafeteriaFacade:
 
             if new_instructions is not None:
                 order.special_instructions = new_instructions
-                order.save()
+                order.save(update_fields=['special_instructions'])
 
             if new_items:
                 from apps.orders.patterns.command import RemoveItemCommand, AddItemCommand
@@ -245,6 +249,9 @@ class CafeteriaFacade:
                         )
                     )
 
+                # Los items precargados ya no reflejan la BD
+                order._prefetched_objects_cache.pop('items', None)
+
             order.calculate_total()
 
             NotificationService.notify_order_modified(order)
@@ -534,7 +541,7 @@ class CafeteriaFacade:
         Obtener resumen completo de una orden
         """
         try:
-            order = Order.objects.get(id=order_id)
+            order = Order.objects.select_related('customer', 'mesero').get(id=order_id)
 
             basic_info = {
                 'id': order.id,
@@ -547,7 +554,7 @@ class CafeteriaFacade:
             }
 
             items = []
-            for item in order.items.all():
+            for item in order.items.select_related('product'):
                 from apps.menu.decorators.product_decorator import DecoratorFactory
                 decorated_info = DecoratorFactory.get_decorated_info(item.product, item.extras)
 
@@ -3,7 +3,9 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from apps.menu.models import Category, Product
+from apps.kitchen.handlers import invalidate_stations_table
 from apps.kitchen.models import KitchenStation
 
 User = get_user_model()
@@ -37,67 +39,58 @@ class Command(BaseCommand):
                     # ------------------------
                     # SUPERUSUARIO / ADMIN
                     # ------------------------
-                    admin_defaults = {
-                        "email": "admin@cafedelbosque.com",
-                        "is_staff": True,
-                        "is_superuser": True,
-                    }
-                    admin, created = User.objects.get_or_create(
-                        username='admin',
-                        defaults=admin_defaults
-                    )
-                    if created:
-                        admin.set_password("admin123")
-                        admin.role = "ADMIN"
-                        admin.save()
+                    if not User.objects.filter(username='admin').exists():
+                        # create_superuser hashea la clave y asigna rol ADMIN en un solo INSERT
+                        User.objects.create_superuser(
+                            username='admin',
+                            email="admin@cafedelbosque.com",
+                            password="admin123"
+                        )
                         self.stdout.write(self.style.SUCCESS("✓ Superusuario creado"))
                     else:
                         self.stdout.write("✓ Superusuario ya existe")
 
                     # ------------------------
-                    # MESEROS
+                    # MESEROS Y COCINEROS
                     # ------------------------
                     meseros = [
                         ("maria_mesera", "María", "González", "maria@cafedelbosque.com"),
                         ("juan_mesero", "Juan", "Pérez", "juan@cafedelbosque.com"),
                     ]
-                    for username, fname, lname, email in meseros:
-                        u, created = User.objects.get_or_create(
-                            username=username,
-                            defaults={
-                                "first_name": fname,
-                                "last_name": lname,
-                                "email": email,
-                                "role": "MESERO"
-                            }
-                        )
-                        u.set_password("mesero123")
-                        u.role = "MESERO"
-                        u.save()
-
-                    self.stdout.write("✓ Meseros verificados/creados")
-
-                    # ------------------------
-                    # COCINEROS
-                    # ------------------------
                     cocineros = [
                         ("carlos_chef", "Carlos", "Rodríguez", "carlos@cafedelbosque.com"),
                         ("laura_chef", "Laura", "Ramírez", "laura@cafedelbosque.com"),
                     ]
-                    for username, fname, lname, email in cocineros:
-                        u, created = User.objects.get_or_create(
+                    roles = [
+                        ("MESERO", "mesero123", meseros),
+                        ("COCINERO", "chef123", cocineros),
+                    ]
+
+                    # Un hash por clave distinta, no uno por usuario
+                    hashed = {password: make_password(password) for _, password, _ in roles}
+
+                    staff = [
+                        User(
                             username=username,
-                            defaults={
-                                "first_name": fname,
-                                "last_name": lname,
-                                "email": email,
-                                "role": "COCINERO"
-                            }
+                            first_name=fname,
+                            last_name=lname,
+                            email=email,
+                            role=role,
+                            password=hashed[password]
                         )
-                        u.set_password("chef123")
-                        u.role = "COCINERO"
-                        u.save()
+                        for role, password, data in roles
+                        for username, fname, lname, email in data
+                    ]
 
+                    # Un solo INSERT; los existentes conservan sus datos y se les restablece rol y clave
+                    User.objects.bulk_create(
+                        staff,
+                        update_conflicts=True,
+                        unique_fields=['username'],
+                        update_fields=['role', 'password']
+                    )
+
+                    self.stdout.write("✓ Meseros verificados/creados")
                     self.stdout.write("✓ Cocineros verificados/creados")
 
                     # ------------------------
@@ -146,18 +139,23 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS("✓ Categorías y productos verificados/creados"))
 
                 # === ESTACIONES DE COCINA ===
-                KitchenStation.objects.update_or_create(
-                    name="Estación Bebidas Calientes",
-                    defaults={"station_type": "BEBIDAS_CALIENTES", "is_active": True}
-                )
-                KitchenStation.objects.update_or_create(
-                    name="Estación Platos Fuertes",
-                    defaults={"station_type": "PLATOS_FUERTES", "is_active": True}
-                )
-                KitchenStation.objects.update_or_create(
-                    name="Estación Postres",
-                    defaults={"station_type": "POSTRES", "is_active": True}
+                stations = [
+                    ("Estación Bebidas Calientes", "BEBIDAS_CALIENTES"),
+                    ("Estación Platos Fuertes", "PLATOS_FUERTES"),
+                    ("Estación Postres", "POSTRES"),
+                ]
+                # Un solo INSERT; name es único, así que las existentes solo se actualizan
+                KitchenStation.objects.bulk_create(
+                    [
+                        KitchenStation(name=name, station_type=stype, is_active=True)
+                        for name, stype in stations
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['name'],
+                    update_fields=['station_type', 'is_active']
                 )
+                # bulk_create no emite post_save: invalidar el enrutamiento al confirmar
+                transaction.on_commit(invalidate_stations_table)
 
                 self.stdout.write(self.style.SUCCESS("✓ Estaciones de cocina verificadas/creadas"))
 
@@ -146,7 +146,7 @@ class NewOrderProcessTemplate(OrderProcessTemplate):
         print(f"[NEW ORDER] Procesando {order.items.count()} items")
 
         processed = []
-        for item in order.items.all():
+        for item in order.items.select_related('product'):
             # Verificar disponibilidad
             if not item.product.is_available:
                 print(f"[NEW ORDER] ⚠️ Producto no disponible: {item.product.name}")
@@ -217,12 +217,9 @@ class ReadyOrderProcessTemplate(OrderProcessTemplate):
         print("[READY ORDER] ✓ Todos los items completos")
         return [{'status': 'all_complete'}]
 
-    def notify_stakeholders(self, order):
-        """Notificar mesero que orden está lista"""
-        print(f"[READY ORDER] Notificando mesero")
-
-        from apps.notifications.services import NotificationService
-        NotificationService.notify_order_ready(order)
+    def should_notify(self):
+        """ORDER_READY lo envía ReadyState al confirmar el paso a LISTO"""
+        return False
 
 
 class DeliveredOrderProcessTemplate(OrderProcessTemplate):
@@ -311,8 +308,8 @@ class CancelledOrderProcessTemplate(OrderProcessTemplate):
         """Registrar cancelación en historial"""
         print(f"[CANCELLED ORDER] Registrando en historial")
 
-        from apps.orders.models import OrderHistory
-        OrderHistory.objects.create(
+        from apps.orders.history import record_history
+        record_history(
             order=order,
             action='CANCEL_PROCESSED',
             previous_status=order.status,
@@ -7,4 +7,7 @@ from django.apps import AppConfig
 class KitchenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.kitchen'
-    verbose_name = 'Cocina'
\ No newline at end of file
+    verbose_name = 'Cocina'
+
+    def ready(self):
+        from . import signals  # noqa: F401
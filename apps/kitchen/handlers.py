@@ -2,10 +2,67 @@
 CHAIN OF RESPONSIBILITY: Enrutamiento inteligente a estaciones de cocina
 Cada handler decide si procesa el item o lo pasa al siguiente
 """
+import time
 from abc import ABC, abstractmethod
+
+from django.core.cache import cache
+
+from apps.orders.models import OrderItem
 from .models import KitchenStation, StationQueue
 from datetime import datetime
 
+# Estaciones activas por tipo; se carga una vez por proceso y se recarga cuando:
+# - cambia la versión compartida en el caché (invalidate_stations_table, que
+#   las señales de KitchenStation llaman al confirmar la transacción), o
+# - pasan STATIONS_TTL segundos (cubre escrituras que no emiten señales,
+#   como queryset.update(), y cachés no compartidos entre procesos)
+STATIONS_TTL = 30
+STATIONS_VERSION_KEY = 'kitchen:stations_version'
+
+_STATIONS_BY_TYPE = None
+_stations_version = None
+_stations_loaded_at = 0.0
+
+
+def _current_stations_version():
+    """Versión de la tabla de estaciones compartida en el caché"""
+    return cache.get_or_set(STATIONS_VERSION_KEY, 1, timeout=None)
+
+
+def get_stations_by_type():
+    """Tabla {station_type: KitchenStation} de estaciones activas (una consulta al cargarla)"""
+    global _STATIONS_BY_TYPE, _stations_version, _stations_loaded_at
+
+    version = _current_stations_version()
+    now = time.monotonic()
+    if (
+        _STATIONS_BY_TYPE is None
+        or version != _stations_version
+        or now - _stations_loaded_at > STATIONS_TTL
+    ):
+        table = {}
+        for station in KitchenStation.objects.filter(is_active=True).order_by('id'):
+            table.setdefault(station.station_type, station)
+        _STATIONS_BY_TYPE, _stations_version, _stations_loaded_at = table, version, now
+    return _STATIONS_BY_TYPE
+
+
+def invalidate_stations_table():
+    """
+    Descartar la tabla de estaciones en todos los procesos que comparten el caché
+
+    Llamarla después de confirmar la escritura (transaction.on_commit); los
+    queryset.update() y bulk_create() sobre KitchenStation no emiten señales
+    y deben llamarla ellos mismos
+    """
+    global _STATIONS_BY_TYPE
+    _STATIONS_BY_TYPE = None
+    try:
+        cache.incr(STATIONS_VERSION_KEY)
+    except ValueError:
+        # La clave aún no existe (o expiró): cualquier valor nuevo invalida
+        cache.set(STATIONS_VERSION_KEY, 2, timeout=None)
+
 
 class StationHandler(ABC):
     """
@@ -15,7 +72,6 @@ class StationHandler(ABC):
 
     def __init__(self):
         self._next_handler = None
-        self._station = None
 
     def set_next(self, handler):
         """
@@ -79,35 +135,29 @@ class StationHandler(ABC):
         Returns:
             KitchenStation asignada
         """
-        try:
-            if not self._station:
-                self._station = KitchenStation.objects.get(
-                    station_type=self.get_station_type(),
-                    is_active=True
-                )
-
-            # Verificar si ya existe en la cola
-            existing = StationQueue.objects.filter(
-                station=self._station,
-                order=order,
-                is_completed=False
-            ).first()
+        station = get_stations_by_type().get(self.get_station_type())
+        if station is None:
+            print(f"[CHAIN] ✗ Estación {self.get_station_type()} no encontrada")
+            return None
 
-            if not existing:
-                queue_item = StationQueue.objects.create(
-                    station=self._station,
-                    order=order
-                )
+        # Verificar si ya existe en la cola
+        existing = StationQueue.objects.filter(
+            station=station,
+            order=order,
+            is_completed=False
+        ).first()
 
-                print(f"[CHAIN] ✓ '{order_item.product.name}' → {self._station.name}")
-                return self._station
-            else:
-                print(f"[CHAIN] ℹ Orden #{order.id} ya en cola de {self._station.name}")
-                return self._station
+        if not existing:
+            queue_item = StationQueue.objects.create(
+                station=station,
+                order=order
+            )
 
-        except KitchenStation.DoesNotExist:
-            print(f"[CHAIN] ✗ Estación {self.get_station_type()} no encontrada")
-            return None
+            print(f"[CHAIN] ✓ '{order_item.product.name}' → {station.name}")
+            return station
+        else:
+            print(f"[CHAIN] ℹ Orden #{order.id} ya en cola de {station.name}")
+            return station
 
     def get_priority(self, order_item):
         """
@@ -327,8 +377,8 @@ class KitchenRouter:
         assignments = {}
         items_by_priority = []
 
-        # Procesar cada item y calcular prioridad
-        for item in order.items.all():
+        # Procesar cada item y calcular prioridad (los handlers leen producto y categoría)
+        for item in OrderItem.for_order(order.id):
             # Obtener handler apropiado
             handler = self._get_handler_for_item(item)
             priority = handler.get_priority(item) if handler else 0
@@ -506,7 +556,7 @@ class KitchenRouter:
 
             # Avanzar orden a LISTO automáticamente
             try:
-                order = Order.objects.get(id=order_id)
+                order = Order.objects.select_related('customer', 'mesero').get(id=order_id)
                 if order.status == 'EN_PREPARACION':
                     from apps.orders.patterns.state import OrderStateManager
                     OrderStateManager.advance_order(order)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='kitchenstation',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
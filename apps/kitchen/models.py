@@ -18,7 +18,7 @@ class KitchenStation(models.Model):
         ('POSTRES', 'Postres'),
     ]
 
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     station_type = models.CharField(max_length=30, choices=STATION_TYPES)
     is_active = models.BooleanField(default=True)
     can_handle_categories = models.JSONField(
@@ -44,15 +44,6 @@ class StationQueue(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
 
-    class Meta:
-        db_table = 'station_queue'
-        verbose_name = 'Cola de Estación'
-        verbose_name_plural = 'Colas de Estaciones'
-        ordering = ['assigned_at']
-
-    def __str__(self):
-        return f"{self.station.name} - Orden #{self.order.id}"
-
     def mark_completed(self):
         """Marcar como completado"""
         self.is_completed = True
@@ -0,0 +1,21 @@
+"""
+Señales de estaciones de cocina
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .handlers import invalidate_stations_table
+from .models import KitchenStation
+
+
+@receiver(post_save, sender=KitchenStation)
+@receiver(post_delete, sender=KitchenStation)
+def invalidate_routing_stations(sender, **kwargs):
+    """
+    Invalidar la tabla de estaciones usada por el enrutamiento
+
+    Al confirmar la transacción: antes, un enrutamiento concurrente podría
+    recargar las filas viejas y quedarse con ellas
+    """
+    transaction.on_commit(invalidate_stations_table)
@@ -1,7 +1,9 @@
 """
 DECORATOR: Añadir extras personalizados a productos dinámicamente
 """
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from decimal import Decimal
 
 
@@ -261,6 +263,12 @@ class ToppingDecorator(ProductDecorator):
 class DecoratorFactory:
     """Factory para crear decoradores según extras solicitados"""
 
+    # (product.pk, product.updated_at, extras_key) -> info decorada, en orden LRU
+    # updated_at forma parte de la clave: editar el producto invalida sus entradas
+    _info_cache = OrderedDict()
+    _info_lock = threading.Lock()
+    INFO_CACHE_SIZE = 1024
+
     @staticmethod
     def apply_extras(product, extras_dict):
         """
@@ -311,19 +319,69 @@ class DecoratorFactory:
 
         return component
 
+    @staticmethod
+    def extras_key(extras_dict):
+        """
+        Clave hashable y canónica de un dict de extras (sirve para cachear)
+
+        Las listas (ej. toppings) se convierten en tuplas
+        """
+        return tuple(sorted(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in extras_dict.items()
+        ))
+
     @staticmethod
     def get_decorated_info(product, extras_dict):
         """
         Obtener información completa del producto decorado
 
         Returns:
-            dict con nombre, precio, descripción y tiempo
+            dict con nombre, precio (Decimal), descripción y tiempo
         """
+        # Productos sin guardar no tienen identidad estable: sin caché
+        if product.pk is None:
+            return DecoratorFactory._build_decorated_info(product, extras_dict)
+
+        cache = DecoratorFactory._info_cache
+        key = (product.pk, product.updated_at, DecoratorFactory.extras_key(extras_dict))
+
+        try:
+            hash(key)
+        except TypeError:
+            # Extras con valores no hashables (ej. dicts anidados): sin caché
+            return DecoratorFactory._build_decorated_info(product, extras_dict)
+
+        with DecoratorFactory._info_lock:
+            info = cache.get(key)
+            if info is not None:
+                cache.move_to_end(key)
+
+        if info is None:
+            # Se arma fuera del lock; si dos hilos coinciden, el segundo solo reescribe la entrada
+            info = DecoratorFactory._build_decorated_info(product, extras_dict)
+            with DecoratorFactory._info_lock:
+                cache[key] = info
+                cache.move_to_end(key)
+                if len(cache) > DecoratorFactory.INFO_CACHE_SIZE:
+                    # Descartar la entrada menos usada
+                    cache.popitem(last=False)
+
+        # Copia para que el llamador no altere la entrada cacheada
+        return {**info, 'extras_applied': list(info['extras_applied'])}
+
+    @staticmethod
+    def _build_decorated_info(product, extras_dict):
+        """Recorrer la cadena de decoradores y armar la info"""
         decorated = DecoratorFactory.apply_extras(product, extras_dict)
 
+        price = decorated.get_price()
+        if not isinstance(price, Decimal):
+            price = Decimal(str(price))
+
         return {
             'name': decorated.get_name(),
-            'price': float(decorated.get_price()),
+            'price': price,
             'description': decorated.get_description(),
             'preparation_time': decorated.get_preparation_time(),
             'base_price': float(product.base_price),
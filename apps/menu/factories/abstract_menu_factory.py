@@ -2,7 +2,7 @@
 ABSTRACT FACTORY: Familias completas de menús por temporada
 """
 from abc import ABC, abstractmethod
-from apps.menu.models import Product, Category
+from apps.menu.models import Product
 
 
 class AbstractMenuFactory(ABC):
@@ -46,11 +46,6 @@ class RegularMenuFactory(AbstractMenuFactory):
 
     def create_hot_beverages(self):
         """Bebidas calientes regulares"""
-        cat = Category.objects.get_or_create(
-            name='Bebidas Calientes',
-            category_type='BEBIDAS'
-        )[0]
-
         return Product.objects.filter(
             category__category_type='BEBIDAS',
             season__isnull=True,
@@ -39,23 +39,6 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-    def get_all_products(self):
-        """
-        COMPOSITE: Obtener todos los productos de esta categoría
-        y sus subcategorías recursivamente
-        """
-        products = list(self.products.filter(is_available=True))
-
-        for subcategory in self.subcategories.filter(is_active=True):
-            products.extend(subcategory.get_all_products())
-
-        return products
-
-    def get_total_price(self):
-        """COMPOSITE: Calcular precio total de todos los productos"""
-        total = sum(p.base_price for p in self.get_all_products())
-        return total
-
     def add_subcategory(self, name, description=""):
         """Agregar subcategoría (operación composite)"""
         subcategory = Category.objects.create(
@@ -74,18 +57,34 @@ class Category(models.Model):
             subcategory.save()
             print(f"[COMPOSITE] Subcategoría '{subcategory.name}' removida de '{self.name}'")
 
+    def get_descendant_ids(self):
+        """
+        COMPOSITE: IDs de esta categoría y de sus subcategorías activas
+
+        Recorre el árbol por niveles: una consulta por nivel de profundidad
+        """
+        ids = {self.id}
+        level = [self.id]
+
+        while level:
+            level = list(
+                Category.objects.filter(parent_id__in=level, is_active=True)
+                .exclude(id__in=ids)
+                .values_list('id', flat=True)
+            )
+            ids.update(level)
+
+        return ids
+
     def get_all_products(self):
         """
         COMPOSITE: Obtener todos los productos recursivamente
         Incluye productos de subcategorías
         """
-        products = list(self.products.filter(is_available=True))
-
-        # Recursivamente obtener productos de subcategorías
-        for subcategory in self.subcategories.filter(is_active=True):
-            products.extend(subcategory.get_all_products())
-
-        return products
+        return list(
+            Product.objects.filter(category_id__in=self.get_descendant_ids(), is_available=True)
+            .select_related('category')
+        )
 
     def get_total_price(self):
         """COMPOSITE: Calcular precio total de todos los productos"""
@@ -94,12 +93,9 @@ class Category(models.Model):
 
     def get_product_count(self):
         """COMPOSITE: Contar productos recursivamente"""
-        count = self.products.filter(is_available=True).count()
-
-        for subcategory in self.subcategories.filter(is_active=True):
-            count += subcategory.get_product_count()
-
-        return count
+        return Product.objects.filter(
+            category_id__in=self.get_descendant_ids(), is_available=True
+        ).count()
 
     def display_hierarchy(self, level=0):
         """
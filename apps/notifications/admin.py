@@ -0,0 +1,13 @@
+"""
+Admin para notificaciones
+"""
+from django.contrib import admin
+from .models import InAppNotification
+
+
+@admin.register(InAppNotification)
+class InAppNotificationAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'category', 'priority', 'is_read', 'created_at']
+    list_filter = ['category', 'priority', 'is_read']
+    search_fields = ['recipient', 'message']
+    readonly_fields = ['created_at']
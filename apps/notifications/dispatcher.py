@@ -0,0 +1,72 @@
+"""
+Despachador de notificaciones en segundo plano
+Un pool fijo y pequeño de hilos ejecuta los envíos; cada trabajo libera
+las conexiones a BD que haya abierto, porque las estrategias usan el ORM
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 4
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _run(fn, args, kwargs):
+    """Ejecutar un trabajo cerrando las conexiones obsoletas antes y después"""
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    """Crear el pool la primera vez que se usa"""
+    global _executor
+
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=WORKERS, thread_name_prefix='notification-dispatcher'
+                )
+    return _executor
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Ejecutar fn(*args, **kwargs) en el pool
+
+    Returns:
+        Future con el resultado del trabajo
+    """
+    return _get_executor().submit(_run, fn, args, kwargs)
+
+
+def enqueue(description, fn, *args, **kwargs):
+    """
+    Encolar fn(*args, **kwargs) sin esperar su resultado
+
+    El resultado no vuelve al llamador: si el trabajo lanza una excepción
+    o devuelve {'success': False, ...} se registra en el log con su descripción.
+
+    Args:
+        description: texto que identifica el trabajo en el log
+    """
+    def _log_failure(future):
+        error = future.exception()
+        if error is not None:
+            logger.error("[DISPATCHER] %s falló: %s", description, error)
+            return
+
+        result = future.result()
+        if isinstance(result, dict) and not result.get('success', True):
+            logger.error("[DISPATCHER] %s falló: %s", description, result.get('error', 'sin detalle'))
+
+    submit(fn, *args, **kwargs).add_done_callback(_log_failure)
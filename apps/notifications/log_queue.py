@@ -0,0 +1,48 @@
+"""
+Handler de logging basado en cola para las notificaciones
+El hilo de la petición solo encola el registro; un QueueListener
+en segundo plano lo escribe en el handler real (stdout)
+"""
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler que inicia su QueueListener con el primer registro
+
+    Así los procesos que solo cargan settings (migrate, shell, tests) no
+    levantan el hilo del listener si nunca registran nada
+    """
+
+    def __init__(self, handler):
+        log_queue = queue.SimpleQueue()
+        super().__init__(log_queue)
+        self._listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def _start_listener(self):
+        """Iniciar el listener una sola vez y detenerlo (vaciando la cola) al salir"""
+        with self._start_lock:
+            if not self._started:
+                self._listener.start()
+                atexit.register(self._listener.stop)
+                self._started = True
+
+    def enqueue(self, record):
+        if not self._started:
+            self._start_listener()
+        super().enqueue(record)
+
+
+def queue_handler():
+    """
+    Crear el handler de cola para las notificaciones
+
+    Se usa como fábrica ('()') en settings.LOGGING
+    """
+    return LazyQueueHandler(logging.StreamHandler())
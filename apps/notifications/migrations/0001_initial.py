@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-16 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InAppNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.CharField(db_index=True, max_length=255)),
+                ('message', models.TextField()),
+                ('category', models.CharField(default='general', max_length=50)),
+                ('priority', models.CharField(default='normal', max_length=20)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Notificación In-App',
+                'verbose_name_plural': 'Notificaciones In-App',
+                'db_table': 'in_app_notifications',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
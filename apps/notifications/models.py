@@ -0,0 +1,27 @@
+"""
+Modelos para notificaciones
+"""
+from django.db import models
+
+
+class InAppNotification(models.Model):
+    """
+    Notificación in-app guardada en BD para mostrarse dentro de la aplicación
+    """
+
+    recipient = models.CharField(max_length=255, db_index=True)
+    message = models.TextField()
+    category = models.CharField(max_length=50, default='general')
+    priority = models.CharField(max_length=20, default='normal')
+    data = models.JSONField(default=dict, blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'in_app_notifications'
+        verbose_name = 'Notificación In-App'
+        verbose_name_plural = 'Notificaciones In-App'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.recipient}: {self.message[:50]}"
@@ -2,18 +2,50 @@
 OBSERVER: Sistema de notificaciones con observers múltiples
 Los observers se registran y reciben notificaciones automáticas
 """
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque
+
+
+class _PayloadView:
+    """Vista de datos para format_map: las claves ausentes se muestran como None"""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._data.get(key)
+
+
+def _render(templates, event, data):
+    """Formatear el mensaje de log de un evento usando su plantilla"""
+    template = templates.get(event)
+    if template is None:
+        return f"📨 {event}: {data}"
+    return template.format_map(_PayloadView(data))
 
 
 class Observer(ABC):
     """Observer abstracto para recibir notificaciones"""
 
+    __slots__ = ('observer_id', 'name', 'notifications', 'attached_at', '_next_id', '_by_id', '_unread')
+
+    OBSERVER_TYPE = 'Observer'
+
+    # Segundos que un observer puede permanecer registrado (~duración de una orden)
+    TTL = 1800
+
     def __init__(self, observer_id, name):
         self.observer_id = observer_id
         self.name = name
         self.notifications = []
+        self.attached_at = time.monotonic()
+        self._next_id = 0
+        self._by_id = {}
+        self._unread = 0
 
     @abstractmethod
     def update(self, subject, event, data):
@@ -34,25 +66,70 @@ class Observer(ABC):
     def clear_notifications(self):
         """Limpiar notificaciones"""
         self.notifications = []
+        self._by_id = {}
+        self._unread = 0
+
+    def _new_id(self):
+        """Siguiente id entero de notificación (único por observer)"""
+        nid = self._next_id
+        self._next_id += 1
+        return nid
+
+    def _store(self, notification):
+        """Guardar notificación e indexarla por id"""
+        self.notifications.append(notification)
+        self._by_id[notification['id']] = notification
+        if not notification['read']:
+            self._unread += 1
 
     def get_unread_count(self):
-        """Contar notificaciones no leídas"""
-        return len([n for n in self.notifications if not n.get('read', False)])
+        """Contar notificaciones no leídas (contador mantenido al guardar/leer)"""
+        return self._unread
+
+    def is_expired(self, now=None):
+        """Verificar si el observer superó su TTL"""
+        if now is None:
+            now = time.monotonic()
+        return now - self.attached_at > self.TTL
 
     def mark_as_read(self, notification_id):
-        """Marcar notificación como leída"""
-        for notif in self.notifications:
-            if notif.get('id') == notification_id:
-                notif['read'] = True
+        """
+        Marcar notificación como leída
+
+        Args:
+            notification_id: id entero de la notificación
+        """
+        notif = self._by_id.get(notification_id)
+        if notif is not None and not notif['read']:
+            notif['read'] = True
+            self._unread -= 1
 
 
 class Subject:
     """
     Subject que mantiene lista de observers y los notifica
+
+    Los observers con estación asignada (chefs) se indexan por estación,
+    así solo reciben los eventos dirigidos a su estación.
     """
 
-    def __init__(self):
+    def __init__(self, *observers):
         self._observers = []
+        self._by_station = defaultdict(list)
+        # Observers iniciales: se registran en silencio (el Subject puede crearse al importar)
+        for observer in observers:
+            self._bucket_for(observer).append(observer)
+
+    def _bucket_for(self, observer):
+        """Lista donde vive el observer según su estación"""
+        station = getattr(observer, 'assigned_station', None)
+        return self._by_station[station] if station else self._observers
+
+    def _iter_all(self):
+        """Iterar todos los observers registrados"""
+        yield from self._observers
+        for observers in self._by_station.values():
+            yield from observers
 
     def attach(self, observer: Observer):
         """
@@ -61,8 +138,9 @@ class Subject:
         Args:
             observer: Observer a agregar
         """
-        if observer not in self._observers:
-            self._observers.append(observer)
+        bucket = self._bucket_for(observer)
+        if observer not in bucket:
+            bucket.append(observer)
             print(f"[SUBJECT] Observer registrado: {observer.name}")
 
     def detach(self, observer: Observer):
@@ -74,19 +152,35 @@ class Subject:
         """
         if observer in self._observers:
             self._observers.remove(observer)
-            print(f"[SUBJECT] Observer desregistrado: {observer.name}")
+        else:
+            for station, observers in self._by_station.items():
+                if observer in observers:
+                    observers.remove(observer)
+                    if not observers:
+                        del self._by_station[station]
+                    break
+            else:
+                return
+        print(f"[SUBJECT] Observer desregistrado: {observer.name}")
 
     def notify(self, event, data):
         """
-        Notificar a todos los observers
+        Notificar a los observers generales y a los de la estación del evento
 
         Args:
             event: tipo de evento
             data: datos del evento
         """
-        print(f"[SUBJECT] Notificando evento '{event}' a {len(self._observers)} observer(s)")
+        observers = self._observers
+        station = data.get('station')
+        if station is not None:
+            station_observers = self._by_station.get(station)
+            if station_observers:
+                observers = observers + station_observers
+
+        print(f"[SUBJECT] Notificando evento '{event}' a {len(observers)} observer(s)")
 
-        for observer in self._observers:
+        for observer in observers:
             try:
                 observer.update(self, event, data)
             except Exception as e:
@@ -94,23 +188,42 @@ class Subject:
 
     def get_observers_count(self):
         """Obtener cantidad de observers"""
-        return len(self._observers)
+        return len(self._observers) + sum(len(obs) for obs in self._by_station.values())
 
     def get_observers_list(self):
         """Obtener lista de observers"""
-        return [
-            {
+        return list(self.iter_observers_info())
+
+    def iter_observers_info(self):
+        """Generar la información de cada observer de forma perezosa"""
+        for obs in self._iter_all():
+            yield {
                 'id': obs.observer_id,
                 'name': obs.name,
-                'type': type(obs).__name__
+                'type': obs.OBSERVER_TYPE
             }
-            for obs in self._observers
-        ]
 
 
 class WaiterObserver(Observer):
     """Observer para meseros - recibe notificaciones de órdenes listas"""
 
+    __slots__ = ('waiter',)
+
+    OBSERVER_TYPE = 'WaiterObserver'
+
+    _LOG_TEMPLATES = {
+        'ORDER_READY': "🔔 Orden #{order_id} LISTA - Mesa {table}",
+        'ORDER_ASSIGNED': "📋 Nueva orden asignada #{order_id} - Mesa {table}",
+        'ORDER_DELAYED': "⚠️ Orden #{order_id} RETRASADA",
+    }
+
+    _PRIORITIES = {
+        'ORDER_READY': 'high',
+        'ORDER_DELAYED': 'high',
+        'ORDER_ASSIGNED': 'medium',
+        'ORDER_CANCELLED': 'low'
+    }
+
     def __init__(self, waiter):
         super().__init__(waiter.id, f"Mesero: {waiter.username}")
         self.waiter = waiter
@@ -118,7 +231,7 @@ class WaiterObserver(Observer):
     def update(self, subject, event, data):
         """Recibir notificación de evento"""
         notification = {
-            'id': f"{self.observer_id}_{len(self.notifications)}",
+            'id': self._new_id(),
             'timestamp': datetime.now().isoformat(),
             'event': event,
             'data': data,
@@ -128,27 +241,14 @@ class WaiterObserver(Observer):
             'priority': self._calculate_priority(event, data)
         }
 
-        self.notifications.append(notification)
+        self._store(notification)
 
         # Log según tipo de evento
-        if event == 'ORDER_READY':
-            print(f"[MESERO {self.waiter.username}] 🔔 Orden #{data.get('order_id')} LISTA - Mesa {data.get('table')}")
-        elif event == 'ORDER_ASSIGNED':
-            print(f"[MESERO {self.waiter.username}] 📋 Nueva orden asignada #{data.get('order_id')} - Mesa {data.get('table')}")
-        elif event == 'ORDER_DELAYED':
-            print(f"[MESERO {self.waiter.username}] ⚠️ Orden #{data.get('order_id')} RETRASADA")
-        else:
-            print(f"[MESERO {self.waiter.username}] 📨 {event}: {data}")
+        print(f"[MESERO {self.waiter.username}] {_render(self._LOG_TEMPLATES, event, data)}")
 
     def _calculate_priority(self, event, data):
         """Calcular prioridad de la notificación"""
-        priority_map = {
-            'ORDER_READY': 'high',
-            'ORDER_DELAYED': 'high',
-            'ORDER_ASSIGNED': 'medium',
-            'ORDER_CANCELLED': 'low'
-        }
-        return priority_map.get(event, 'normal')
+        return self._PRIORITIES.get(event, 'normal')
 
     def get_pending_orders(self):
         """Obtener órdenes pendientes de servir"""
@@ -159,16 +259,60 @@ class WaiterObserver(Observer):
 
 
 class KitchenObserver(Observer):
-    """Observer para cocina - recibe notificaciones de nuevas órdenes"""
+    """
+    Observer para cocina - recibe notificaciones de nuevas órdenes
+
+    Recibe todos los eventos del servicio, así que guarda solo las
+    últimas MAX_NOTIFICATIONS en un buffer circular
+    """
+
+    __slots__ = ('kitchen_id',)
+
+    OBSERVER_TYPE = 'KitchenObserver'
+
+    MAX_NOTIFICATIONS = 256
+
+    _LOG_TEMPLATES = {
+        'NEW_ORDER': "🍳 Nueva orden #{order_id} - Mesa {table} - {items_count} items",
+        'ORDER_IN_PREPARATION': "🔥 Orden #{order_id} EN PREPARACIÓN - {items_count} items",
+        'ORDER_CANCELLED': "❌ Orden #{order_id} CANCELADA",
+        'ORDER_MODIFIED': "⚠️ Orden #{order_id} MODIFICADA",
+    }
+
+    _PRIORITIES = {
+        'NEW_ORDER': 'high',
+        'ORDER_IN_PREPARATION': 'high',
+        'ORDER_MODIFIED': 'high',
+        'ORDER_CANCELLED': 'medium'
+    }
 
     def __init__(self, kitchen_id="main_kitchen"):
         super().__init__(kitchen_id, "Cocina Principal")
         self.kitchen_id = kitchen_id
+        self.notifications = deque(maxlen=self.MAX_NOTIFICATIONS)
+
+    def _store(self, notification):
+        """Guardar notificación descartando la más antigua si el buffer está lleno"""
+        if len(self.notifications) == self.MAX_NOTIFICATIONS:
+            evicted = self.notifications[0]
+            del self._by_id[evicted['id']]
+            if not evicted['read']:
+                self._unread -= 1
+        super()._store(notification)
+
+    def get_notifications(self):
+        """Obtener las notificaciones guardadas (de la más antigua a la más reciente)"""
+        return list(self.notifications)
+
+    def clear_notifications(self):
+        """Limpiar notificaciones"""
+        super().clear_notifications()
+        self.notifications = deque(maxlen=self.MAX_NOTIFICATIONS)
 
     def update(self, subject, event, data):
         """Recibir notificación de nueva orden"""
         notification = {
-            'id': f"{self.observer_id}_{len(self.notifications)}",
+            'id': self._new_id(),
             'timestamp': datetime.now().isoformat(),
             'event': event,
             'data': data,
@@ -177,27 +321,14 @@ class KitchenObserver(Observer):
             'priority': self._calculate_priority(event, data)
         }
 
-        self.notifications.append(notification)
+        self._store(notification)
 
         # Log según evento
-        if event == 'NEW_ORDER':
-            items_count = data.get('items_count', 0)
-            print(f"[COCINA] 🍳 Nueva orden #{data.get('order_id')} - Mesa {data.get('table')} - {items_count} items")
-        elif event == 'ORDER_CANCELLED':
-            print(f"[COCINA] ❌ Orden #{data.get('order_id')} CANCELADA")
-        elif event == 'ORDER_MODIFIED':
-            print(f"[COCINA] ⚠️ Orden #{data.get('order_id')} MODIFICADA")
-        else:
-            print(f"[COCINA] 📨 {event}: {data}")
+        print(f"[COCINA] {_render(self._LOG_TEMPLATES, event, data)}")
 
     def _calculate_priority(self, event, data):
         """Calcular prioridad"""
-        priority_map = {
-            'NEW_ORDER': 'high',
-            'ORDER_MODIFIED': 'high',
-            'ORDER_CANCELLED': 'medium'
-        }
-        return priority_map.get(event, 'normal')
+        return self._PRIORITIES.get(event, 'normal')
 
     def get_active_orders(self):
         """Obtener órdenes activas en cocina"""
@@ -210,14 +341,28 @@ class KitchenObserver(Observer):
 class ChefObserver(Observer):
     """Observer para cocineros individuales"""
 
+    __slots__ = ('chef', 'assigned_station')
+
+    OBSERVER_TYPE = 'ChefObserver'
+
     def __init__(self, chef):
         super().__init__(chef.id, f"Chef: {chef.username}")
         self.chef = chef
         self.assigned_station = None
 
-    def set_station(self, station_type):
-        """Asignar estación al chef"""
+    def set_station(self, station_type, subject=None):
+        """
+        Asignar estación al chef
+
+        Args:
+            station_type: tipo de estación
+            subject: Subject donde ya está registrado (se re-indexa)
+        """
+        if subject is not None:
+            subject.detach(self)
         self.assigned_station = station_type
+        if subject is not None:
+            subject.attach(self)
         print(f"[CHEF {self.chef.username}] Asignado a estación: {station_type}")
 
     def update(self, subject, event, data):
@@ -227,7 +372,7 @@ class ChefObserver(Observer):
             return  # No es para esta estación
 
         notification = {
-            'id': f"{self.observer_id}_{len(self.notifications)}",
+            'id': self._new_id(),
             'timestamp': datetime.now().isoformat(),
             'event': event,
             'data': data,
@@ -238,7 +383,7 @@ class ChefObserver(Observer):
             'priority': 'high' if event == 'NEW_ORDER' else 'normal'
         }
 
-        self.notifications.append(notification)
+        self._store(notification)
 
         print(f"[CHEF {self.chef.username}] 👨‍🍳 {event} - Orden #{data.get('order_id')}")
 
@@ -246,6 +391,22 @@ class ChefObserver(Observer):
 class CustomerObserver(Observer):
     """Observer para clientes - recibe actualizaciones de sus órdenes"""
 
+    __slots__ = ('customer',)
+
+    OBSERVER_TYPE = 'CustomerObserver'
+
+    # Eventos relevantes para el cliente y su mensaje amigable
+    _MESSAGE_TEMPLATES = {
+        'ORDER_CONFIRMED': "✅ Tu orden #{order_id} ha sido confirmada",
+        'ORDER_IN_PREPARATION': "👨‍🍳 Tu orden está siendo preparada",
+        'ORDER_READY': "🎉 ¡Tu orden está lista! Mesa {table}",
+        'ORDER_DELIVERED': "✅ Orden entregada. ¡Buen provecho!",
+        'ORDER_CANCELLED': "❌ Tu orden fue cancelada",
+        'ORDER_DELAYED': "⏰ Tu orden se está demorando un poco más"
+    }
+
+    _HIGH_PRIORITY = frozenset({'ORDER_READY', 'ORDER_CANCELLED', 'ORDER_DELAYED'})
+
     def __init__(self, customer):
         super().__init__(customer.id, f"Cliente: {customer.username}")
         self.customer = customer
@@ -253,20 +414,11 @@ class CustomerObserver(Observer):
     def update(self, subject, event, data):
         """Recibir notificación"""
         # Solo notificar eventos relevantes para el cliente
-        relevant_events = [
-            'ORDER_CONFIRMED',
-            'ORDER_IN_PREPARATION',
-            'ORDER_READY',
-            'ORDER_DELIVERED',
-            'ORDER_CANCELLED',
-            'ORDER_DELAYED'
-        ]
-
-        if event not in relevant_events:
+        if event not in self._MESSAGE_TEMPLATES:
             return
 
         notification = {
-            'id': f"{self.observer_id}_{len(self.notifications)}",
+            'id': self._new_id(),
             'timestamp': datetime.now().isoformat(),
             'event': event,
             'data': data,
@@ -276,25 +428,15 @@ class CustomerObserver(Observer):
             'priority': self._calculate_priority(event)
         }
 
-        self.notifications.append(notification)
-
-        # Mensajes amigables para el cliente
-        messages = {
-            'ORDER_CONFIRMED': f"✅ Tu orden #{data.get('order_id')} ha sido confirmada",
-            'ORDER_IN_PREPARATION': f"👨‍🍳 Tu orden está siendo preparada",
-            'ORDER_READY': f"🎉 ¡Tu orden está lista! Mesa {data.get('table')}",
-            'ORDER_DELIVERED': f"✅ Orden entregada. ¡Buen provecho!",
-            'ORDER_CANCELLED': f"❌ Tu orden fue cancelada",
-            'ORDER_DELAYED': f"⏰ Tu orden se está demorando un poco más"
-        }
+        self._store(notification)
 
-        message = messages.get(event, f"{event}")
+        # Mensaje amigable para el cliente
+        message = self._MESSAGE_TEMPLATES[event].format_map(_PayloadView(data))
         print(f"[CLIENTE {self.customer.username}] {message}")
 
     def _calculate_priority(self, event):
         """Calcular prioridad"""
-        high_priority = ['ORDER_READY', 'ORDER_CANCELLED', 'ORDER_DELAYED']
-        return 'high' if event in high_priority else 'normal'
+        return 'high' if event in self._HIGH_PRIORITY else 'normal'
 
 
 class NotificationService:
@@ -304,12 +446,79 @@ class NotificationService:
     """
 
     _instance = None
-    _subject = None
-    _kitchen_observer = None
+
+    # Estado compartido a nivel de clase: los métodos de clase lo usan
+    # sin necesidad de instanciar el servicio
+    _kitchen_observer = KitchenObserver()
+    _subject = Subject(_kitchen_observer)
+
     _waiter_observers = {}
     _chef_observers = {}
     _customer_observers = {}
 
+    # Registro de observers según el rol del usuario
+    _REGISTRY_BY_ROLE = {
+        'MESERO': '_waiter_observers',
+        'COCINERO': '_chef_observers',
+        'CLIENTE': '_customer_observers',
+    }
+
+    # Barrido de observers expirados cada N notificaciones
+    _GC_EVERY = 50
+    _notify_calls = 0
+    _OPEN_ORDER_STATUSES = ('PENDIENTE', 'EN_PREPARACION', 'LISTO')
+
+    # Payload de cada evento: callable(order, extra) -> dict
+    _PAYLOAD_BUILDERS = {
+        'NEW_ORDER': lambda o, e: {
+            'order_id': o.id,
+            'table': o.table_number,
+            'items_count': o.items.count(),
+            'customer': o.customer.username,
+            'total': float(o.total_price),
+            'special_instructions': o.special_instructions
+        },
+        'ORDER_IN_PREPARATION': lambda o, e: {
+            'order_id': o.id,
+            'table': o.table_number,
+            'items_count': o.items.count()
+        },
+        'ORDER_READY': lambda o, e: {
+            'order_id': o.id,
+            'table': o.table_number,
+            'customer': o.customer.username
+        },
+        'ORDER_DELIVERED': lambda o, e: {
+            'order_id': o.id,
+            'table': o.table_number,
+            'delivered_at': o.delivered_at.isoformat() if o.delivered_at else None
+        },
+        'ORDER_CANCELLED': lambda o, e: {
+            'order_id': o.id,
+            'table': o.table_number,
+            'reason': e.get('reason', '')
+        },
+        'ORDER_MODIFIED': lambda o, e: {
+            'order_id': o.id,
+            'table': o.table_number,
+            'items_count': o.items.count()
+        },
+        'ORDER_DELAYED': lambda o, e: {
+            'order_id': o.id,
+            'table': o.table_number
+        },
+    }
+
+    _EVENT_LABELS = {
+        'NEW_ORDER': 'nueva orden',
+        'ORDER_IN_PREPARATION': 'orden en preparación',
+        'ORDER_READY': 'orden lista',
+        'ORDER_DELIVERED': 'orden entregada',
+        'ORDER_CANCELLED': 'orden cancelada',
+        'ORDER_MODIFIED': 'orden modificada',
+        'ORDER_DELAYED': 'orden retrasada',
+    }
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -318,10 +527,6 @@ class NotificationService:
 
     def _initialize(self):
         """Inicializar servicio"""
-        self._subject = Subject()
-        self._kitchen_observer = KitchenObserver()
-        self._subject.attach(self._kitchen_observer)
-
         print("[NOTIFICATION SERVICE] Servicio inicializado")
         print("[NOTIFICATION SERVICE] Observer de cocina registrado por defecto")
 
@@ -406,6 +611,73 @@ class NotificationService:
             del cls._customer_observers[customer.id]
             print(f"[NOTIFICATION SERVICE] Cliente desregistrado: {customer.username}")
 
+    @classmethod
+    def _maybe_gc(cls):
+        """Ejecutar el barrido de observers de forma oportunista"""
+        cls._notify_calls += 1
+        if cls._notify_calls % cls._GC_EVERY == 0:
+            cls._gc_sweep()
+
+    @classmethod
+    def _gc_sweep(cls):
+        """
+        Desregistrar clientes cuyo TTL expiró y que no tienen órdenes abiertas
+
+        Returns:
+            int: cantidad de observers removidos
+        """
+        now = time.monotonic()
+        stale = [
+            observer for observer in cls._customer_observers.values()
+            if observer.is_expired(now)
+        ]
+        if not stale:
+            return 0
+
+        from apps.orders.models import Order
+
+        busy = set(
+            Order.objects.filter(
+                customer_id__in=[observer.observer_id for observer in stale],
+                status__in=cls._OPEN_ORDER_STATUSES
+            ).values_list('customer_id', flat=True)
+        )
+
+        removed = 0
+        for observer in stale:
+            if observer.observer_id not in busy:
+                cls.unregister_customer(observer.customer)
+                removed += 1
+
+        if removed:
+            print(f"[NOTIFICATION SERVICE] {removed} cliente(s) expirado(s) desregistrado(s)")
+        return removed
+
+    @classmethod
+    def _prepare(cls, event, order, extra):
+        """Registrar el evento y construir su payload"""
+        cls._maybe_gc()
+        label = cls._EVENT_LABELS.get(event, event)
+        print(f"\n[NOTIFICATION SERVICE] === Notificando {label} #{order.id} ===")
+        return cls._PAYLOAD_BUILDERS[event](order, extra)
+
+    @classmethod
+    def dispatch(cls, event, order, **extra):
+        """
+        Notificar un evento de orden a todos los observers
+
+        Args:
+            event: tipo de evento (clave de _PAYLOAD_BUILDERS)
+            order: instancia de Order
+            **extra: datos adicionales del evento (ej: reason)
+
+        Returns:
+            dict: payload enviado
+        """
+        data = cls._prepare(event, order, extra)
+        cls._subject.notify(event, data)
+        return data
+
     @classmethod
     def notify_new_order(cls, order):
         """
@@ -414,16 +686,17 @@ class NotificationService:
         Args:
             order: instancia de Order
         """
-        print(f"\n[NOTIFICATION SERVICE] === Notificando nueva orden #{order.id} ===")
+        cls.dispatch('NEW_ORDER', order)
 
-        cls._subject.notify('NEW_ORDER', {
-            'order_id': order.id,
-            'table': order.table_number,
-            'items_count': order.items.count(),
-            'customer': order.customer.username,
-            'total': float(order.total_price),
-            'special_instructions': order.special_instructions
-        })
+    @classmethod
+    def notify_kitchen(cls, order):
+        """
+        Notificar que la orden entró en preparación
+
+        Args:
+            order: instancia de Order
+        """
+        cls.dispatch('ORDER_IN_PREPARATION', order)
 
     @classmethod
     def notify_order_ready(cls, order):
@@ -433,13 +706,7 @@ class NotificationService:
         Args:
             order: instancia de Order
         """
-        print(f"\n[NOTIFICATION SERVICE] === Notificando orden lista #{order.id} ===")
-
-        data = {
-            'order_id': order.id,
-            'table': order.table_number,
-            'customer': order.customer.username
-        }
+        data = cls._prepare('ORDER_READY', order, {})
 
         # Notificar a mesero específico si está asignado
         if order.mesero and order.mesero.id in cls._waiter_observers:
@@ -457,52 +724,38 @@ class NotificationService:
     @classmethod
     def notify_order_delivered(cls, order):
         """Notificar que orden fue entregada"""
-        print(f"\n[NOTIFICATION SERVICE] === Notificando orden entregada #{order.id} ===")
-
-        data = {
-            'order_id': order.id,
-            'table': order.table_number,
-            'delivered_at': order.delivered_at.isoformat() if order.delivered_at else None
-        }
+        data = cls._prepare('ORDER_DELIVERED', order, {})
 
         # Notificar al cliente
         if order.customer.id in cls._customer_observers:
             observer = cls._customer_observers[order.customer.id]
             observer.update(cls._subject, 'ORDER_DELIVERED', data)
 
+            # La orden terminó: si el cliente no tiene otras abiertas, deja de estar suscrito
+            from apps.orders.models import Order
+
+            has_open_orders = Order.objects.filter(
+                customer_id=order.customer.id,
+                status__in=cls._OPEN_ORDER_STATUSES
+            ).exclude(pk=order.pk).exists()
+
+            if not has_open_orders:
+                cls.unregister_customer(order.customer)
+
     @classmethod
     def notify_order_cancelled(cls, order, reason=""):
         """Notificar cancelación de orden"""
-        print(f"\n[NOTIFICATION SERVICE] === Notificando orden cancelada #{order.id} ===")
-
-        data = {
-            'order_id': order.id,
-            'table': order.table_number,
-            'reason': reason
-        }
-
-        cls._subject.notify('ORDER_CANCELLED', data)
+        cls.dispatch('ORDER_CANCELLED', order, reason=reason)
 
     @classmethod
     def notify_order_modified(cls, order):
         """Notificar modificación de orden"""
-        print(f"\n[NOTIFICATION SERVICE] === Notificando orden modificada #{order.id} ===")
-
-        cls._subject.notify('ORDER_MODIFIED', {
-            'order_id': order.id,
-            'table': order.table_number,
-            'items_count': order.items.count()
-        })
+        cls.dispatch('ORDER_MODIFIED', order)
 
     @classmethod
     def notify_order_delayed(cls, order):
         """Notificar orden retrasada"""
-        print(f"\n[NOTIFICATION SERVICE] === Notificando orden retrasada #{order.id} ===")
-
-        data = {
-            'order_id': order.id,
-            'table': order.table_number
-        }
+        data = cls._prepare('ORDER_DELAYED', order, {})
 
         # Notificar a mesero y cliente
         if order.mesero and order.mesero.id in cls._waiter_observers:
@@ -539,6 +792,25 @@ class NotificationService:
         """Obtener notificaciones de cocina"""
         return cls._kitchen_observer.get_notifications()
 
+    @classmethod
+    def get_kitchen_unread_count(cls):
+        """Cantidad de notificaciones de cocina sin leer"""
+        return cls._kitchen_observer.get_unread_count()
+
+    @classmethod
+    def get_notifications_for(cls, user):
+        """
+        Obtener notificaciones de un usuario según su rol
+
+        Returns:
+            tuple: (notificaciones, cantidad sin leer)
+        """
+        registry = cls._REGISTRY_BY_ROLE.get(user.role)
+        observer = getattr(cls, registry).get(user.id) if registry else None
+        if observer is None:
+            return [], 0
+        return observer.get_notifications(), observer.get_unread_count()
+
     @classmethod
     def get_service_stats(cls):
         """Obtener estadísticas del servicio"""
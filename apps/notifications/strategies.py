@@ -2,15 +2,132 @@
 STRATEGY: Estrategias para diferentes canales de notificación
 Permite cambiar dinámicamente el método de envío
 """
-from abc import ABC, abstractmethod
+import atexit
+import logging
+import re
+import threading
+import time
 from datetime import datetime
+from functools import lru_cache
+from typing import Protocol
+
+from django.db import close_old_connections
+
+from . import dispatcher
+
+logger = logging.getLogger(__name__)
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Al menos 10 dígitos, admitiendo +, espacios, guiones y paréntesis
+_PHONE_RE = re.compile(r"^\+?[\s\-()]*(?:\d[\s\-()]*){10,}$")
+
+# Icono de consola según categoría
+_ICONS = {
+    'order': '📋',
+    'kitchen': '🍳',
+    'ready': '✅',
+    'alert': '⚠️',
+    'error': '❌',
+    'general': '📨'
+}
+
+
+@lru_cache(maxsize=4096)
+def _valid_email(recipient):
+    """Validar formato de email (cacheado por destinatario)"""
+    return _EMAIL_RE.match(recipient) is not None
+
+
+@lru_cache(maxsize=4096)
+def _valid_phone(recipient):
+    """Validar formato de teléfono (cacheado por destinatario)"""
+    return _PHONE_RE.match(recipient) is not None
+
+
+# Notificaciones de orden: tipo -> (categoría, prioridad, plantilla del mensaje)
+_ORDER_NOTIF_SPEC = {
+    'new': ('order', 'high', "Nueva orden #{oid} recibida - Mesa {t}"),
+    'ready': ('ready', 'high', "Orden #{oid} lista para servir - Mesa {t}"),
+    'delivered': ('order', 'normal', "Orden #{oid} entregada exitosamente"),
+    'cancelled': ('alert', 'medium', "Orden #{oid} ha sido cancelada"),
+}
+_ORDER_NOTIF_DEFAULT = ('general', 'normal', "Actualización de orden #{oid}")
+
+# Un segmento SMS admite 160 caracteres GSM-7 o, si el texto tiene algún
+# caracter fuera de ese alfabeto (á, í, ó, ú, emojis...), 70 unidades UCS-2
+SMS_GSM7_LIMIT = 160
+SMS_UCS2_LIMIT = 70
+
+_GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+# Caracteres de la tabla de extensión GSM: ocupan dos septetos
+_GSM7_EXTENDED = frozenset("^{}\\[~]|€\f")
+_GSM7_CHARS = _GSM7_BASIC | _GSM7_EXTENDED
+
+
+@lru_cache(maxsize=1024)
+def _truncate_sms(message):
+    """Recortar el mensaje a un segmento SMS según su codificación (GSM-7 o UCS-2)"""
+    if _GSM7_CHARS.issuperset(message):
+        limit = SMS_GSM7_LIMIT
+        costs = [2 if ch in _GSM7_EXTENDED else 1 for ch in message]
+    else:
+        limit = SMS_UCS2_LIMIT
+        # Fuera del BMP (la mayoría de emojis) se usa un par sustituto
+        costs = [2 if ord(ch) > 0xFFFF else 1 for ch in message]
+
+    if sum(costs) <= limit:
+        return message
 
+    budget = limit - 3  # espacio para '...'
+    used = 0
+    for i, cost in enumerate(costs):
+        if used + cost > budget:
+            return message[:i] + '...'
+        used += cost
+    return message
 
-class NotificationStrategy(ABC):
-    """Estrategia abstracta para enviar notificaciones"""
 
-    @abstractmethod
-    def send(self, recipient, message, **kwargs):
+class TokenBucket:
+    """
+    Limitador de tasa (token bucket) para proteger proveedores externos
+
+    Permite ráfagas de hasta `capacity` envíos y luego `refill_rate` por segundo
+    """
+
+    __slots__ = ('capacity', 'refill_rate', 'tokens', 'last_refill', '_lock')
+
+    def __init__(self, capacity, refill_rate):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n=1):
+        """
+        Consumir n tokens
+
+        Returns:
+            bool: True si había tokens disponibles
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+            self.last_refill = now
+
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+
+
+class NotificationStrategy(Protocol):
+    """Contrato estructural de una estrategia de notificación"""
+
+    def send(self, recipient, message, **kwargs) -> dict:
         """
         Enviar notificación
 
@@ -22,12 +139,17 @@ class NotificationStrategy(ABC):
         Returns:
             dict con resultado
         """
-        pass
+        ...
 
-    @abstractmethod
-    def get_type(self):
+    def get_type(self) -> str:
         """Tipo de estrategia"""
-        pass
+        ...
+
+
+class BaseNotificationStrategy:
+    """Base concreta con el comportamiento por defecto de las estrategias"""
+
+    __slots__ = ()
 
     def validate_recipient(self, recipient):
         """Validar destinatario"""
@@ -38,70 +160,62 @@ class NotificationStrategy(ABC):
         return message
 
 
-class ConsoleNotificationStrategy(NotificationStrategy):
+class ConsoleNotificationStrategy(BaseNotificationStrategy):
     """
     Estrategia de consola (para desarrollo y testing)
     """
 
+    __slots__ = ()
+
     def send(self, recipient, message, **kwargs):
         """Imprimir en consola"""
         priority = kwargs.get('priority', 'normal')
         category = kwargs.get('category', 'general')
 
-        icon = self._get_icon(category)
-
-        print(f"\n{'='*60}")
-        print(f"{icon} NOTIFICACIÓN [{priority.upper()}]")
-        print(f"Para: {recipient}")
-        print(f"Categoría: {category}")
-        print(f"Mensaje: {message}")
-
-        if 'order_id' in kwargs:
-            print(f"Orden: #{kwargs['order_id']}")
+        icon = _ICONS.get(category, '📨')
+        now = datetime.now()
 
-        if 'table' in kwargs:
-            print(f"Mesa: {kwargs['table']}")
-
-        print(f"Hora: {datetime.now().strftime('%H:%M:%S')}")
-        print(f"{'='*60}\n")
+        logger.info(
+            "%s NOTIFICACIÓN [%s] %s → %s: %s (orden: %s, mesa: %s, hora: %s)",
+            icon, priority.upper(), category, recipient, message,
+            kwargs.get('order_id', '-'), kwargs.get('table', '-'),
+            now.strftime('%H:%M:%S')
+        )
 
         return {
             'success': True,
             'type': 'console',
             'recipient': recipient,
-            'timestamp': datetime.now().isoformat()
-        }
-
-    def _get_icon(self, category):
-        """Obtener icono según categoría"""
-        icons = {
-            'order': '📋',
-            'kitchen': '🍳',
-            'ready': '✅',
-            'alert': '⚠️',
-            'error': '❌',
-            'general': '📨'
+            'timestamp': now.isoformat()
         }
-        return icons.get(category, '📨')
 
     def get_type(self):
         return 'console'
 
 
-class EmailNotificationStrategy(NotificationStrategy):
+class EmailNotificationStrategy(BaseNotificationStrategy):
     """
     Estrategia de email (simulada - integrar con servicio real)
     """
 
+    __slots__ = ('_bucket',)
+
+    def __init__(self):
+        self._bucket = TokenBucket(capacity=20, refill_rate=5.0)
+
     def send(self, recipient, message, **kwargs):
         """Simular envío de email"""
+        if not self._bucket.consume():
+            logger.warning("[EMAIL] Límite de envíos alcanzado, descartando envío a %s", recipient)
+            return {'success': False, 'error': 'rate_limited', 'type': 'email'}
+
         subject = kwargs.get('subject', 'Notificación - Café del Bosque')
         priority = kwargs.get('priority', 'normal')
 
-        print(f"\n[EMAIL] Enviando a {recipient}")
-        print(f"  Asunto: {subject}")
-        print(f"  Prioridad: {priority}")
-        print(f"  Mensaje: {message[:100]}...")
+        logger.info(
+            "[EMAIL] Enviando a %s | Asunto: %s | Prioridad: %s | Mensaje: %.100s",
+            recipient, subject, priority, message
+        )
 
         # Aquí iría la integración real con servicio de email
         # Ejemplo: Django's send_mail, SendGrid, Mailgun, etc.
@@ -127,24 +241,32 @@ class EmailNotificationStrategy(NotificationStrategy):
 
     def validate_recipient(self, recipient):
         """Validar formato de email"""
-        return '@' in recipient and '.' in recipient.split('@')[1]
+        return _valid_email(recipient)
 
     def get_type(self):
         return 'email'
 
 
-class SMSNotificationStrategy(NotificationStrategy):
+class SMSNotificationStrategy(BaseNotificationStrategy):
     """
     Estrategia de SMS (simulada - integrar con Twilio u otro)
     """
 
+    __slots__ = ('_bucket',)
+
+    def __init__(self):
+        self._bucket = TokenBucket(capacity=5, refill_rate=1.0)
+
     def send(self, recipient, message, **kwargs):
         """Simular envío de SMS"""
-        # Limitar mensaje a 160 caracteres
-        sms_message = message[:160]
+        if not self._bucket.consume():
+            logger.warning("[SMS] Límite de envíos alcanzado, descartando envío a %s", recipient)
+            return {'success': False, 'error': 'rate_limited', 'type': 'sms'}
 
-        print(f"\n[SMS] Enviando a {recipient}")
-        print(f"  Mensaje ({len(sms_message)} chars): {sms_message}")
+        # Limitar mensaje a un segmento SMS
+        sms_message = _truncate_sms(message)
+
+        logger.info("[SMS] Enviando a %s (%d chars): %s", recipient, len(sms_message), sms_message)
 
         # Aquí iría integración con servicio SMS
         """
@@ -168,36 +290,36 @@ class SMSNotificationStrategy(NotificationStrategy):
 
     def validate_recipient(self, recipient):
         """Validar formato de teléfono"""
-        # Remover caracteres no numéricos
-        digits = ''.join(filter(str.isdigit, recipient))
-        return len(digits) >= 10
-
-    def format_message(self, message, **kwargs):
-        """Limitar mensaje para SMS"""
-        if len(message) > 160:
-            return message[:157] + '...'
-        return message
+        return _valid_phone(recipient)
 
     def get_type(self):
         return 'sms'
 
 
-class PushNotificationStrategy(NotificationStrategy):
+class PushNotificationStrategy(BaseNotificationStrategy):
     """
     Estrategia de notificaciones push (simulada - integrar con FCM, OneSignal, etc.)
     """
 
+    __slots__ = ('_bucket',)
+
+    def __init__(self):
+        self._bucket = TokenBucket(capacity=100, refill_rate=50.0)
+
     def send(self, recipient, message, **kwargs):
         """Simular notificación push"""
+        if not self._bucket.consume():
+            logger.warning("[PUSH] Límite de envíos alcanzado, descartando envío a %s", recipient)
+            return {'success': False, 'error': 'rate_limited', 'type': 'push'}
+
         title = kwargs.get('title', 'Café del Bosque')
         priority = kwargs.get('priority', 'normal')
         data = kwargs.get('data', {})
 
-        print(f"\n[PUSH] Enviando a {recipient}")
-        print(f"  Título: {title}")
-        print(f"  Mensaje: {message}")
-        print(f"  Prioridad: {priority}")
-        print(f"  Data: {data}")
+        logger.info(
+            "[PUSH] Enviando a %s | Título: %s | Prioridad: %s | Mensaje: %s | Data: %s",
+            recipient, title, priority, message, data
+        )
 
         # Aquí iría integración con servicio push
         """
@@ -231,29 +353,40 @@ class PushNotificationStrategy(NotificationStrategy):
         return 'push'
 
 
-class WebSocketNotificationStrategy(NotificationStrategy):
+class WebSocketNotificationStrategy(BaseNotificationStrategy):
     """
     Estrategia de WebSocket (para notificaciones en tiempo real)
     """
 
+    __slots__ = ()
+
     def send(self, recipient, message, **kwargs):
-        """Enviar a través de WebSocket"""
-        channel = kwargs.get('channel', 'notifications')
+        """Enviar a través de WebSocket (al grupo indicado en `channel`)"""
+        group_name = kwargs.pop('channel', 'notifications')
+        return self.send_to_group(group_name, message, recipient=recipient, **kwargs)
+
+    def send_to_group(self, group_name, message, recipient=None, **kwargs):
+        """
+        Publicar un único mensaje en un grupo
+
+        La capa de Channels reparte el mensaje a todos los consumers
+        suscritos al grupo (ej: 'kitchen'), sin un envío por destinatario
+        """
         event_type = kwargs.get('event_type', 'notification')
 
-        print(f"\n[WEBSOCKET] Enviando a canal '{channel}'")
-        print(f"  Destinatario: {recipient}")
-        print(f"  Evento: {event_type}")
-        print(f"  Mensaje: {message}")
+        logger.info(
+            "[WEBSOCKET] Enviando a grupo '%s' | Destinatario: %s | Evento: %s | Mensaje: %s",
+            group_name, recipient, event_type, message
+        )
 
         # Aquí iría integración con Django Channels o similar
         """
         from channels.layers import get_channel_layer
         from asgiref.sync import async_to_sync
-        
+
         channel_layer = get_channel_layer()
         async_to_sync(channel_layer.group_send)(
-            channel,
+            group_name,
             {
                 'type': event_type,
                 'message': message,
@@ -266,7 +399,7 @@ class WebSocketNotificationStrategy(NotificationStrategy):
         return {
             'success': True,
             'type': 'websocket',
-            'channel': channel,
+            'channel': group_name,
             'recipient': recipient,
             'timestamp': datetime.now().isoformat()
         }
@@ -275,29 +408,47 @@ class WebSocketNotificationStrategy(NotificationStrategy):
         return 'websocket'
 
 
-class InAppNotificationStrategy(NotificationStrategy):
+class InAppNotificationStrategy(BaseNotificationStrategy):
     """
     Estrategia de notificaciones in-app (almacenadas en BD)
+
+    Las notificaciones se acumulan en un buffer y se guardan por lotes con
+    bulk_create: al llegar a FLUSH_SIZE o cada FLUSH_INTERVAL segundos
     """
 
-    def send(self, recipient, message, **kwargs):
-        """Guardar notificación en BD"""
-        from apps.users.models import User
+    __slots__ = ()
 
-        print(f"\n[IN-APP] Guardando notificación para {recipient}")
+    FLUSH_SIZE = 200
+    FLUSH_INTERVAL = 0.5
+    # Tope del buffer si la BD no responde: se descartan las más antiguas
+    MAX_PENDING = 10000
 
-        # Aquí se guardaría en un modelo de notificaciones
-        """
+    _buffer = []
+    _lock = threading.Lock()
+    _flusher = None
+
+    def send(self, recipient, message, **kwargs):
+        """Encolar notificación para guardarla en BD"""
         from apps.notifications.models import InAppNotification
-        
-        notification = InAppNotification.objects.create(
-            user_id=recipient,
+
+        logger.info("[IN-APP] Guardando notificación para %s", recipient)
+
+        notification = InAppNotification(
+            recipient=str(recipient),
             message=message,
             category=kwargs.get('category', 'general'),
             priority=kwargs.get('priority', 'normal'),
             data=kwargs.get('data', {})
         )
-        """
+
+        cls = type(self)
+        with cls._lock:
+            cls._buffer.append(notification)
+            pending = len(cls._buffer)
+
+        cls._ensure_flusher()
+        if pending >= cls.FLUSH_SIZE:
+            cls.flush()
 
         return {
             'success': True,
@@ -306,10 +457,111 @@ class InAppNotificationStrategy(NotificationStrategy):
             'timestamp': datetime.now().isoformat()
         }
 
+    @classmethod
+    def flush(cls):
+        """
+        Guardar en BD las notificaciones pendientes
+
+        Returns:
+            int: cantidad de notificaciones guardadas
+        """
+        with cls._lock:
+            if not cls._buffer:
+                return 0
+            pending, cls._buffer = cls._buffer, []
+
+        from apps.notifications.models import InAppNotification
+
+        try:
+            InAppNotification.objects.bulk_create(pending, batch_size=500, ignore_conflicts=True)
+        except Exception:
+            # Devolver el lote al buffer para reintentarlo en el próximo flush
+            with cls._lock:
+                cls._buffer[:0] = pending
+                overflow = len(cls._buffer) - cls.MAX_PENDING
+                if overflow > 0:
+                    del cls._buffer[:overflow]
+            if overflow > 0:
+                logger.warning("[IN-APP] Buffer lleno, %d notificación(es) descartada(s)", overflow)
+            raise
+
+        logger.debug("[IN-APP] %d notificación(es) guardada(s)", len(pending))
+        return len(pending)
+
+    @classmethod
+    def _ensure_flusher(cls):
+        """Iniciar (una sola vez) el hilo que vacía el buffer periódicamente"""
+        if cls._flusher is not None:
+            return
+
+        with cls._lock:
+            if cls._flusher is not None:
+                return
+            cls._flusher = threading.Thread(
+                target=cls._flush_loop, name='in-app-flusher', daemon=True
+            )
+
+        atexit.register(cls.flush)
+        cls._flusher.start()
+
+    @classmethod
+    def _flush_loop(cls):
+        """
+        Vaciar el buffer cada FLUSH_INTERVAL segundos
+
+        El hilo no pasa por el ciclo de peticiones de Django, así que descarta
+        él mismo las conexiones caídas u obsoletas antes y después de cada flush
+        """
+        while True:
+            time.sleep(cls.FLUSH_INTERVAL)
+            close_old_connections()
+            try:
+                cls.flush()
+            except Exception as e:
+                logger.error("[IN-APP] Error guardando notificaciones, se reintentará: %s", e)
+            finally:
+                close_old_connections()
+
     def get_type(self):
         return 'in_app'
 
 
+def _make_sender(name, strategy, trusted_recipients):
+    """
+    Construir el envío de una estrategia como un closure
+
+    Los métodos de la estrategia se resuelven una sola vez, al crear el closure
+    """
+    validate = strategy.validate_recipient
+    format_message = strategy.format_message
+    send = strategy.send
+    invalid_error = f'Destinatario inválido para {name}'
+
+    def sender(recipient, message, **kwargs):
+        # Validar destinatario (las direcciones internas ya son conocidas)
+        if recipient not in trusted_recipients and not validate(recipient):
+            return {
+                'success': False,
+                'error': invalid_error,
+                'type': name
+            }
+
+        try:
+            result = send(recipient, format_message(message, **kwargs), **kwargs)
+        except Exception as e:
+            logger.error("[MANAGER] ✗ Error enviando vía %s: %s", name, e)
+            return {
+                'success': False,
+                'error': str(e),
+                'type': name
+            }
+
+        logger.debug("[MANAGER] ✓ Notificación enviada vía %s", name)
+        return result
+
+    return sender
+
+
 class NotificationManager:
     """
     Manager que gestiona múltiples estrategias
@@ -325,6 +577,33 @@ class NotificationManager:
         'in_app': InAppNotificationStrategy()
     }
 
+    _STRATEGY_NAMES = frozenset(_strategies)
+
+    # Destinatarios internos que no necesitan validación
+    _TRUSTED_RECIPIENTS = frozenset({
+        "cocina@cafedelbosque.com",
+        "meseros@cafedelbosque.com",
+        "cliente",
+    })
+
+    # Info estática de las estrategias (no cambia en tiempo de ejecución)
+    _STRATEGY_NAMES_LIST = tuple(_strategies)
+    _STRATEGY_INFO_BY_TYPE = {
+        name: {
+            'type': strategy.get_type(),
+            'name': type(strategy).__name__,
+            'available': True
+        }
+        for name, strategy in _strategies.items()
+    }
+    _STRATEGIES_INFO = tuple(_STRATEGY_INFO_BY_TYPE.values())
+
+    # Pipeline validar → formatear → enviar precompilado por estrategia
+    _senders = {}
+    for _name, _strategy in _strategies.items():
+        _senders[_name] = _make_sender(_name, _strategy, _TRUSTED_RECIPIENTS)
+    del _name, _strategy
+
     @classmethod
     def send_notification(cls, strategy_type, recipient, message, **kwargs):
         """
@@ -339,37 +618,19 @@ class NotificationManager:
         Returns:
             dict con resultado del envío
         """
-        strategy = cls._strategies.get(strategy_type, ConsoleNotificationStrategy())
-
-        # Validar destinatario
-        if not strategy.validate_recipient(recipient):
-            return {
-                'success': False,
-                'error': f'Destinatario inválido para {strategy_type}',
-                'type': strategy_type
-            }
-
-        # Formatear mensaje según canal
-        formatted_message = strategy.format_message(message, **kwargs)
-
-        # Enviar
-        try:
-            result = strategy.send(recipient, formatted_message, **kwargs)
-            print(f"[MANAGER] ✓ Notificación enviada vía {strategy_type}")
-            return result
-        except Exception as e:
-            print(f"[MANAGER] ✗ Error enviando vía {strategy_type}: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'type': strategy_type
-            }
+        sender = cls._senders.get(strategy_type)
+        if sender is None:
+            sender = cls._senders['console']
+        return sender(recipient, message, **kwargs)
 
     @classmethod
     def send_multi_channel(cls, recipient, message, channels=None, **kwargs):
         """
         Enviar notificación por múltiples canales
 
+        Los canales se envían en paralelo en el pool del dispatcher, de modo que la
+        latencia total es la del canal más lento y no la suma de todos.
+
         Args:
             recipient: destinatario
             message: mensaje
@@ -382,23 +643,48 @@ class NotificationManager:
         if channels is None:
             channels = ['console']
 
-        print(f"\n[MANAGER] === Enviando notificación multi-canal ===")
-        print(f"Canales: {', '.join(channels)}")
+        available = [channel for channel in channels if channel in cls._STRATEGY_NAMES]
+
+        if len(available) <= 1:
+            # Un solo canal: se envía en el hilo actual
+            sent = [cls.send_notification(ch, recipient, message, **kwargs) for ch in available]
+            return cls._collect_results(channels, available, sent)
 
+        futures = [
+            dispatcher.submit(cls.send_notification, channel, recipient, message, **kwargs)
+            for channel in available
+        ]
+        sent = [future.exception() or future.result() for future in futures]
+
+        return cls._collect_results(channels, available, sent)
+
+    @classmethod
+    def _collect_results(cls, channels, available, sent):
+        """Armar el dict de resultados por canal y registrar un resumen"""
+        sent_by_channel = dict(zip(available, sent))
         results = {}
+
         for channel in channels:
-            if channel in cls._strategies:
-                result = cls.send_notification(channel, recipient, message, **kwargs)
-                results[channel] = result
-            else:
-                print(f"[MANAGER] ⚠️ Canal '{channel}' no disponible")
+            result = sent_by_channel.get(channel)
+            if result is None:
                 results[channel] = {
                     'success': False,
                     'error': f'Canal {channel} no disponible'
                 }
+            elif isinstance(result, BaseException):
+                results[channel] = {
+                    'success': False,
+                    'error': str(result),
+                    'type': channel
+                }
+            else:
+                results[channel] = result
 
         success_count = sum(1 for r in results.values() if r.get('success'))
-        print(f"[MANAGER] ✓ {success_count}/{len(channels)} canales exitosos\n")
+        logger.info(
+            "[MANAGER] ✓ %d/%d canales exitosos (%s)",
+            success_count, len(channels), ', '.join(channels)
+        )
 
         return results
 
@@ -415,35 +701,16 @@ class NotificationManager:
         Returns:
             dict con resultados
         """
-        messages = {
-            'new': f"Nueva orden #{order.id} recibida - Mesa {order.table_number}",
-            'ready': f"Orden #{order.id} lista para servir - Mesa {order.table_number}",
-            'delivered': f"Orden #{order.id} entregada exitosamente",
-            'cancelled': f"Orden #{order.id} ha sido cancelada"
-        }
+        category, priority, template = _ORDER_NOTIF_SPEC.get(notification_type, _ORDER_NOTIF_DEFAULT)
+        message = template.format(oid=order.id, t=order.table_number)
 
-        categories = {
-            'new': 'order',
-            'ready': 'ready',
-            'delivered': 'order',
-            'cancelled': 'alert'
-        }
-
-        priorities = {
-            'new': 'high',
-            'ready': 'high',
-            'delivered': 'normal',
-            'cancelled': 'medium'
-        }
-
-        message = messages.get(notification_type, f"Actualización de orden #{order.id}")
-        category = categories.get(notification_type, 'general')
-        priority = priorities.get(notification_type, 'normal')
+        extra = {}
 
         # Determinar destinatario
         if notification_type in ['new', 'cancelled']:
-            # Notificar a cocina
+            # Notificar a cocina (un solo mensaje al grupo de WebSocket)
             recipient = "cocina@cafedelbosque.com"
+            extra['channel'] = 'kitchen'
         elif notification_type == 'ready':
             # Notificar a mesero
             recipient = order.mesero.email if order.mesero else "meseros@cafedelbosque.com"
@@ -458,7 +725,8 @@ class NotificationManager:
             category=category,
             priority=priority,
             order_id=order.id,
-            table=order.table_number
+            table=order.table_number,
+            **extra
         )
 
     @classmethod
@@ -518,29 +786,43 @@ class NotificationManager:
             message=message,
             channels=channels or ['console', 'websocket'],
             category='kitchen',
-            priority=priority
+            priority=priority,
+            channel='kitchen'
         )
 
+    @classmethod
+    def has_strategy(cls, strategy_type):
+        """Verificar si existe una estrategia registrada con ese tipo"""
+        return strategy_type in cls._STRATEGY_NAMES
+
+    @classmethod
+    def validate_recipient(cls, strategy_type, recipient):
+        """Validar el destinatario con la estrategia (las direcciones internas ya son conocidas)"""
+        if recipient in cls._TRUSTED_RECIPIENTS:
+            return True
+        return cls._strategies[strategy_type].validate_recipient(recipient)
+
     @classmethod
     def get_available_strategies(cls):
         """Obtener estrategias disponibles"""
-        return list(cls._strategies.keys())
+        return cls._STRATEGY_NAMES_LIST
 
     @classmethod
     def get_strategy_info(cls, strategy_type):
         """Obtener información de una estrategia"""
-        strategy = cls._strategies.get(strategy_type)
-        if strategy:
-            return {
-                'type': strategy.get_type(),
-                'name': type(strategy).__name__,
-                'available': True
-            }
+        info = cls._STRATEGY_INFO_BY_TYPE.get(strategy_type)
+        if info is not None:
+            return info
         return {
             'type': strategy_type,
             'available': False
         }
 
+    @classmethod
+    def get_strategies_info(cls):
+        """Obtener información de todas las estrategias"""
+        return cls._STRATEGIES_INFO
+
     @classmethod
     def test_strategy(cls, strategy_type):
         """
@@ -552,7 +834,7 @@ class NotificationManager:
         Returns:
             resultado del test
         """
-        print(f"\n[MANAGER] === Probando estrategia: {strategy_type} ===")
+        logger.info("[MANAGER] === Probando estrategia: %s ===", strategy_type)
 
         test_message = f"Mensaje de prueba para estrategia {strategy_type}"
         test_recipient = "test@cafedelbosque.com"
@@ -565,7 +847,7 @@ class NotificationManager:
             priority='normal'
         )
 
-        print(f"[MANAGER] Resultado: {'✓ Exitoso' if result.get('success') else '✗ Fallido'}\n")
+        logger.info("[MANAGER] Resultado: %s", '✓ Exitoso' if result.get('success') else '✗ Fallido')
         return result
 
 
@@ -580,7 +862,7 @@ class NotificationContext:
     def set_strategy(self, strategy: NotificationStrategy):
         """Cambiar estrategia"""
         self._strategy = strategy
-        print(f"[CONTEXT] Estrategia cambiada a: {strategy.get_type()}")
+        logger.info("[CONTEXT] Estrategia cambiada a: %s", strategy.get_type())
 
     def send(self, recipient, message, **kwargs):
         """Enviar usando estrategia actual"""
@@ -5,6 +5,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from apps.users.models import User
+from . import dispatcher
 from .services import NotificationService
 from .strategies import NotificationManager
 
@@ -110,14 +111,7 @@ class GetNotificationsView(APIView):
         try:
             user = User.objects.get(id=user_id)
 
-            if user.role == 'MESERO':
-                notifications = NotificationService.get_waiter_notifications(user)
-            elif user.role == 'COCINERO':
-                notifications = NotificationService.get_chef_notifications(user)
-            elif user.role == 'CLIENTE':
-                notifications = NotificationService.get_customer_notifications(user)
-            else:
-                notifications = []
+            notifications, unread_count = NotificationService.get_notifications_for(user)
 
             return Response({
                 'user_id': user.id,
@@ -125,7 +119,7 @@ class GetNotificationsView(APIView):
                 'role': user.role,
                 'notifications': notifications,
                 'count': len(notifications),
-                'unread_count': len([n for n in notifications if not n.get('read', False)])
+                'unread_count': unread_count
             })
 
         except User.DoesNotExist:
@@ -144,7 +138,7 @@ class GetKitchenNotificationsView(APIView):
         return Response({
             'notifications': notifications,
             'count': len(notifications),
-            'unread_count': len([n for n in notifications if not n.get('read', False)])
+            'unread_count': NotificationService.get_kitchen_unread_count()
         })
 
 
@@ -155,6 +149,9 @@ class SendNotificationView(APIView):
         """
         Enviar notificación
 
+        Se valida el destinatario y el envío se encola en el dispatcher (202);
+        los fallos del envío quedan en el log.
+
         Body: {
             "strategy": "console" | "email" | "sms" | "push",
             "recipient": "email@example.com",
@@ -174,7 +171,19 @@ class SendNotificationView(APIView):
                 'error': 'Destinatario y mensaje son requeridos'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        result = NotificationManager.send_notification(
+        if not NotificationManager.has_strategy(strategy):
+            return Response({
+                'error': f'Estrategia {strategy} no disponible'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not NotificationManager.validate_recipient(strategy, recipient):
+            return Response({
+                'error': f'Destinatario inválido para {strategy}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        dispatcher.enqueue(
+            f'Envío {strategy} a {recipient}',
+            NotificationManager.send_notification,
             strategy_type=strategy,
             recipient=recipient,
             message=message,
@@ -182,10 +191,11 @@ class SendNotificationView(APIView):
             category=category
         )
 
-        if result.get('success'):
-            return Response(result)
-        else:
-            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'status': 'queued',
+            'type': strategy,
+            'recipient': recipient
+        }, status=status.HTTP_202_ACCEPTED)
 
 
 class SendMultiChannelNotificationView(APIView):
@@ -195,6 +205,9 @@ class SendMultiChannelNotificationView(APIView):
         """
         Enviar multi-canal
 
+        Se encola un trabajo por cada canal que acepta el destinatario (202);
+        los fallos del envío quedan en el log.
+
         Body: {
             "recipient": "email@example.com",
             "message": "Mensaje",
@@ -212,18 +225,36 @@ class SendMultiChannelNotificationView(APIView):
                 'error': 'Destinatario y mensaje son requeridos'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        results = NotificationManager.send_multi_channel(
-            recipient=recipient,
-            message=message,
-            channels=channels,
-            priority=priority
-        )
+        available = [ch for ch in channels if NotificationManager.has_strategy(ch)]
+        unavailable = [ch for ch in channels if ch not in available]
+        queued = [ch for ch in available if NotificationManager.validate_recipient(ch, recipient)]
+        invalid = [ch for ch in available if ch not in queued]
+
+        if not queued:
+            return Response({
+                'error': 'Ningún canal disponible acepta el destinatario',
+                'unavailable_channels': unavailable,
+                'invalid_recipient_channels': invalid
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Un trabajo por canal: los canales se envían en paralelo en el pool
+        for channel in queued:
+            dispatcher.enqueue(
+                f'Envío {channel} a {recipient}',
+                NotificationManager.send_notification,
+                strategy_type=channel,
+                recipient=recipient,
+                message=message,
+                priority=priority
+            )
 
         return Response({
-            'results': results,
+            'status': 'queued',
+            'queued_channels': queued,
             'total_channels': len(channels),
-            'successful_channels': sum(1 for r in results.values() if r.get('success'))
-        })
+            'unavailable_channels': unavailable,
+            'invalid_recipient_channels': invalid
+        }, status=status.HTTP_202_ACCEPTED)
 
 
 class ServiceStatsView(APIView):
@@ -241,16 +272,11 @@ class AvailableStrategiesView(APIView):
 
     def get(self, request):
         """Obtener estrategias disponibles"""
-        strategies = NotificationManager.get_available_strategies()
-
-        strategies_info = []
-        for strategy in strategies:
-            info = NotificationManager.get_strategy_info(strategy)
-            strategies_info.append(info)
+        strategies_info = NotificationManager.get_strategies_info()
 
         return Response({
             'strategies': strategies_info,
-            'count': len(strategies)
+            'count': len(strategies_info)
         })
 
 
@@ -14,6 +14,7 @@ class OrderItemInline(admin.TabularInline):
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['id', 'customer', 'mesero', 'table_number', 'status', 'total_price', 'created_at']
+    list_select_related = ('customer', 'mesero')
     list_filter = ['status', 'created_at']
     search_fields = ['customer__username', 'mesero__username']
     readonly_fields = ['created_at', 'prepared_at', 'delivered_at', 'total_price']
@@ -35,6 +36,7 @@ class OrderAdmin(admin.ModelAdmin):
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product', 'quantity', 'unit_price', 'subtotal']
+    list_select_related = ('order', 'product')
     list_filter = ['order__status']
     search_fields = ['product__name', 'order__id']
     readonly_fields = ['subtotal']
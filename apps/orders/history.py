@@ -0,0 +1,67 @@
+"""
+Registro del historial de órdenes, con soporte para escrituras por lotes
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.orders import history_buffer
+from apps.orders.models import OrderHistory
+
+_local = threading.local()
+
+
+class OrderHistoryLogger:
+    """
+    Context manager que acumula entradas de historial y las inserta
+    con un solo bulk_create al salir
+
+    Pensado para operaciones masivas (cierre de turno, cancelaciones en lote):
+
+        with transaction.atomic(), OrderHistoryLogger():
+            for order in orders:
+                ...  # record_history(...) se acumula en el lote
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = getattr(_local, 'batch', None)
+        _local.batch = self
+        return self
+
+    def add(self, **fields):
+        """Agregar entrada al lote"""
+        self.entries.append(OrderHistory(**fields))
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.batch = self._previous
+
+        # Si hubo error, la operación se descarta y el historial también
+        if exc_type is None and self.entries:
+            OrderHistory.objects.bulk_create(self.entries)
+        self.entries = []
+        return False
+
+
+def record_history(**fields):
+    """
+    Registrar una entrada de historial
+
+    Dentro de un OrderHistoryLogger se agrega al lote. Fuera de él se
+    inserta de inmediato (caso normal de un comando individual), o bien
+    después del commit, por lotes, si ORDERS_ASYNC_HISTORY está activo
+    """
+    batch = getattr(_local, 'batch', None)
+    if batch is not None:
+        batch.add(**fields)
+        return None
+
+    if settings.ORDERS_ASYNC_HISTORY:
+        transaction.on_commit(lambda: history_buffer.submit(OrderHistory(**fields)))
+        return None
+
+    return OrderHistory.objects.create(**fields)
@@ -0,0 +1,121 @@
+"""
+Buffer de escritura del historial de órdenes
+Las entradas se encolan en memoria y un hilo las inserta por lotes,
+cada BATCH_SIZE entradas o cada FLUSH_INTERVAL segundos
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.db import DatabaseError, DataError, IntegrityError, close_old_connections
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 512
+FLUSH_INTERVAL = 0.1  # segundos
+RETRY_DELAY = 0.5  # segundos, se duplica en cada reintento
+RETRY_MAX_DELAY = 10.0
+
+_queue = queue.SimpleQueue()
+_lock = threading.Lock()
+_writer = None
+
+
+def _write(batch):
+    """
+    Insertar un lote de OrderHistory sin guardar
+
+    Si el lote trae datos inválidos se guardan una por una las entradas
+    válidas y solo se descartan las que fallan.
+
+    Returns:
+        bool: False si la BD no respondió y el lote debe reintentarse
+    """
+    from apps.orders.models import OrderHistory
+
+    try:
+        OrderHistory.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+    except (IntegrityError, DataError) as e:
+        logger.error("[HISTORY] Lote de %s entradas rechazado, se guardan una por una: %s", len(batch), e)
+        for entry in batch:
+            try:
+                OrderHistory.objects.bulk_create([entry])
+            except DatabaseError as entry_error:
+                logger.error("[HISTORY] Entrada de orden #%s descartada: %s", entry.order_id, entry_error)
+    except DatabaseError as e:
+        logger.error("[HISTORY] Error guardando %s entradas, se reintentará: %s", len(batch), e)
+        return False
+    return True
+
+
+def _writer_loop():
+    """Esperar la primera entrada y juntar las que lleguen hasta llenar el lote o vencer el plazo"""
+    while True:
+        batch = [_queue.get()]
+        deadline = time.monotonic() + FLUSH_INTERVAL
+
+        while len(batch) < BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # El hilo no pasa por el ciclo de peticiones: descarta él mismo las
+        # conexiones caídas u obsoletas y reintenta el lote hasta guardarlo
+        delay = RETRY_DELAY
+        while True:
+            close_old_connections()
+            try:
+                written = _write(batch)
+            finally:
+                close_old_connections()
+            if written:
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_DELAY)
+
+
+def _ensure_writer():
+    """Iniciar el hilo escritor la primera vez que se encola algo"""
+    global _writer
+
+    if _writer is not None:
+        return
+
+    with _lock:
+        if _writer is not None:
+            return
+        _writer = threading.Thread(target=_writer_loop, name='order-history-writer', daemon=True)
+        _writer.start()
+        atexit.register(flush)
+
+
+def flush():
+    """Insertar de inmediato todo lo pendiente en la cola"""
+    batch = []
+    while True:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+
+    if batch and not _write(batch):
+        # La BD no respondió: el lote vuelve a la cola para el hilo escritor
+        for entry in batch:
+            _queue.put(entry)
+
+
+def submit(entry):
+    """
+    Encolar una entrada de historial
+
+    Args:
+        entry: instancia de OrderHistory sin guardar
+    """
+    _ensure_writer()
+    _queue.put(entry)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_status_created_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['table_number', 'status'], name='order_table_status_idx'),
+        ),
+    ]
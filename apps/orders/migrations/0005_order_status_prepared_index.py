@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_table_status_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'prepared_at'], name='order_status_prepared_idx'),
+        ),
+    ]
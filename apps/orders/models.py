@@ -2,6 +2,7 @@
 Modelos para órdenes
 """
 from django.db import models
+from django.db.models import Sum
 from apps.users.models import User
 from apps.menu.models import Product
 from decimal import Decimal
@@ -12,13 +13,18 @@ class Order(models.Model):
     Orden de pedido – soporta clientes NO registrados
     """
 
-    STATUS_CHOICES = [
-        ('PENDIENTE', 'Pendiente'),
-        ('EN_PREPARACION', 'En Preparación'),
-        ('LISTO', 'Listo'),
-        ('ENTREGADO', 'Entregado'),
-        ('CANCELADO', 'Cancelado'),
-    ]
+    class Status(models.TextChoices):
+        PENDIENTE = 'PENDIENTE', 'Pendiente'
+        EN_PREPARACION = 'EN_PREPARACION', 'En Preparación'
+        LISTO = 'LISTO', 'Listo'
+        ENTREGADO = 'ENTREGADO', 'Entregado'
+        CANCELADO = 'CANCELADO', 'Cancelado'
+
+    STATUS_CHOICES = Status.choices
+
+    # Estados desde los que se puede avanzar / cancelar
+    _ADVANCEABLE = frozenset({Status.PENDIENTE, Status.EN_PREPARACION, Status.LISTO})
+    _CANCELLABLE = frozenset({Status.PENDIENTE, Status.EN_PREPARACION})
 
     # Cliente no autenticado
     customer_name = models.CharField(
@@ -49,15 +55,15 @@ class Order(models.Model):
 
     status = models.CharField(
         max_length=20,
-        choices=STATUS_CHOICES,
-        default='PENDIENTE'
+        choices=Status.choices,
+        default=Status.PENDIENTE
     )
 
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
     special_instructions = models.TextField(blank=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     prepared_at = models.DateTimeField(null=True, blank=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
 
@@ -66,31 +72,29 @@ class Order(models.Model):
         verbose_name = 'Orden'
         verbose_name_plural = 'Órdenes'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='order_status_created_idx'),
+            models.Index(fields=['table_number', 'status'], name='order_table_status_idx'),
+            models.Index(fields=['status', 'prepared_at'], name='order_status_prepared_idx'),
+        ]
 
     def __str__(self):
         return f"Orden #{self.id} - Mesa {self.table_number} - {self.status}"
 
     def calculate_total(self):
-        """Calcular total de la orden"""
-        total = sum(item.subtotal for item in self.items.all())
+        """Calcular total de la orden (un solo SUM y un UPDATE de la columna)"""
+        total = self.items.aggregate(t=Sum('subtotal'))['t'] or Decimal('0')
+        Order.objects.filter(pk=self.pk).update(total_price=total)
         self.total_price = total
-        self.save()
         return total
 
     def can_advance(self):
         """Verificar si la orden puede avanzar al siguiente estado"""
-        transitions = {
-            'PENDIENTE': True,
-            'EN_PREPARACION': True,
-            'LISTO': True,
-            'ENTREGADO': False,
-            'CANCELADO': False,
-        }
-        return transitions.get(self.status, False)
+        return self.status in self._ADVANCEABLE
 
     def can_cancel(self):
         """Verificar si la orden puede ser cancelada"""
-        return self.status in ['PENDIENTE', 'EN_PREPARACION']
+        return self.status in self._CANCELLABLE
 
 
 class OrderItem(models.Model):
@@ -114,16 +118,27 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.quantity}x {self.product.name}"
 
-    def save(self, *args, **kwargs):
-        """Calcular subtotal antes de guardar"""
-        if not self.unit_price:
-            self.unit_price = self.product.base_price
+    @classmethod
+    def for_order(cls, order_id):
+        """Items de una orden con producto, categoría y orden en una sola consulta"""
+        return cls.objects.filter(order_id=order_id).select_related('product__category', 'order')
 
-        # Calcular precio de extras
-        self.extras_price = self.product.get_extras_price(self.extras)
+    def save(self, *args, recompute=True, **kwargs):
+        """
+        Calcular subtotal antes de guardar
 
-        # Calcular subtotal
-        self.subtotal = (self.unit_price + self.extras_price) * self.quantity
+        Con recompute=False se guardan extras_price y subtotal tal como ya
+        vienen calculados
+        """
+        if recompute:
+            if not self.unit_price:
+                self.unit_price = self.product.base_price
+
+            # Calcular precio de extras
+            self.extras_price = self.product.get_extras_price(self.extras)
+
+            # Calcular subtotal
+            self.subtotal = (self.unit_price + self.extras_price) * self.quantity
 
         super().save(*args, **kwargs)
 
@@ -131,7 +146,7 @@ class OrderItem(models.Model):
         """Calcular subtotal del item"""
         self.extras_price = self.product.get_extras_price(self.extras)
         self.subtotal = (self.unit_price + self.extras_price) * self.quantity
-        self.save()
+        self.save(recompute=False, update_fields=['quantity', 'extras_price', 'subtotal'])
         return self.subtotal
 
 
@@ -1,10 +1,30 @@
 """
 BUILDER: Construir órdenes paso a paso con validaciones y flujo completo
 """
+from django.db import transaction
+
 from apps.orders.models import Order, OrderItem
 from apps.menu.models import Product
 from apps.menu.decorators.product_decorator import DecoratorFactory
 from decimal import Decimal
+from itertools import chain
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _to_cents(price):
+    """Precio (int/Decimal/float) a centavos enteros, sin pasar por str"""
+    if isinstance(price, int):
+        return price * 100
+    if isinstance(price, Decimal):
+        return int(price.scaleb(2).to_integral_value())
+    return round(price * 100)
+
+
+def _from_cents(cents):
+    """Centavos enteros a Decimal con 2 decimales"""
+    return Decimal(cents).scaleb(-2)
 
 
 class OrderBuilder:
@@ -21,10 +41,12 @@ class OrderBuilder:
         self._customer_name = ""
         self._mesero = None
         self._table_number = None
-        self._items = []
+        # product_id -> filas de ese producto (mismo producto con distintos extras)
+        self._items = {}
+        self._running_total_cents = 0
         self._special_instructions = ""
         self._validated = False
-        print("[BUILDER] Builder reseteado")
+        logger.debug("[BUILDER] Builder reseteado")
 
     def set_customer(self, customer):
         """
@@ -37,7 +59,7 @@ class OrderBuilder:
             raise ValueError(f"Usuario debe ser CLIENTE, no {customer.role}")
 
         self._customer = customer
-        print(f"[BUILDER] Cliente establecido: {customer.username}")
+        logger.debug("[BUILDER] Cliente establecido: %s", customer.username)
         return self
 
     def set_customer_name(self, name):
@@ -48,7 +70,7 @@ class OrderBuilder:
             raise ValueError("El nombre del cliente no puede estar vacío")
 
         self._customer_name = name.strip()
-        print(f"[BUILDER] Cliente (no registrado): {self._customer_name}")
+        logger.debug("[BUILDER] Cliente (no registrado): %s", self._customer_name)
         return self
 
     def set_mesero(self, mesero):
@@ -62,7 +84,7 @@ class OrderBuilder:
             raise ValueError(f"Usuario debe ser MESERO, no {mesero.role}")
 
         self._mesero = mesero
-        print(f"[BUILDER] Mesero asignado: {mesero.username if mesero else 'Sin asignar'}")
+        logger.debug("[BUILDER] Mesero asignado: %s", mesero.username if mesero else 'Sin asignar')
         return self
 
     def set_table(self, table_number):
@@ -70,17 +92,28 @@ class OrderBuilder:
         Establecer número de mesa
 
         Args:
-            table_number: int (0 para para llevar)
+            table_number: int o convertible a int (0 para para llevar)
         """
-        if not isinstance(table_number, int) or table_number < 0:
-            raise ValueError("Número de mesa debe ser entero >= 0")
+        error = "Número de mesa debe ser entero >= 0"
+
+        # bool es subclase de int: True no es una mesa
+        if isinstance(table_number, bool):
+            raise ValueError(error)
+
+        try:
+            table_number = int(table_number)
+        except (TypeError, ValueError):
+            raise ValueError(error) from None
+
+        if table_number < 0:
+            raise ValueError(error)
 
         self._table_number = table_number
 
         if table_number == 0:
-            print("[BUILDER] Mesa establecida: PARA LLEVAR")
+            logger.debug("[BUILDER] Mesa establecida: PARA LLEVAR")
         else:
-            print(f"[BUILDER] Mesa establecida: {table_number}")
+            logger.debug("[BUILDER] Mesa establecida: %s", table_number)
 
         return self
 
@@ -101,51 +134,74 @@ class OrderBuilder:
         except Product.DoesNotExist:
             raise ValueError(f"Producto {product_id} no disponible")
 
+        return self._add_item(product, quantity, extras)
+
+    def add_multiple_products(self, products_list):
+        """
+        Agregar múltiples productos de una vez (una sola consulta de productos)
+
+        Args:
+            products_list: lista de dicts [{'product_id': 1, 'quantity': 2, 'extras': {...}}]
+        """
+        ids = [item['product_id'] for item in products_list]
+        products = Product.objects.filter(id__in=ids, is_available=True).in_bulk()
+
+        for item in products_list:
+            product_id = item['product_id']
+            quantity = item.get('quantity', 1)
+
+            if quantity <= 0:
+                raise ValueError("Cantidad debe ser mayor a 0")
+
+            product = products.get(int(product_id))
+            if product is None:
+                raise ValueError(f"Producto {product_id} no disponible")
+
+            self._add_item(product, quantity, item.get('extras', {}))
+
+        return self
+
+    def _add_item(self, product, quantity, extras):
+        """Agregar a la orden un producto ya cargado y validado"""
         if extras is None:
             extras = {}
 
-        # Calcular precio con decoradores
+        # Calcular precio con decoradores (DecoratorFactory ya cachea por producto + extras)
         decorated_info = DecoratorFactory.get_decorated_info(product, extras)
 
+        # Dinero en centavos enteros; Decimal solo al guardar/mostrar
+        unit_price_cents = _to_cents(decorated_info['price'])
+
         item_data = {
             'product': product,
-            'product_id': product_id,
+            'product_id': product.id,
             'quantity': quantity,
             'extras': extras,
-            'unit_price': Decimal(str(decorated_info['price'])),
-            'subtotal': Decimal(str(decorated_info['price'])) * quantity,
+            'unit_price_cents': unit_price_cents,
+            'subtotal_cents': unit_price_cents * quantity,
             'decorated_name': decorated_info['name']
         }
 
-        self._items.append(item_data)
+        self._items.setdefault(product.id, []).append(item_data)
+        self._running_total_cents += item_data['subtotal_cents']
 
-        print(f"[BUILDER] Producto agregado: {decorated_info['name']} x{quantity} = ${item_data['subtotal']}")
+        logger.debug("[BUILDER] Producto agregado: %s x%s = $%s",
+                     decorated_info['name'], quantity, _from_cents(item_data['subtotal_cents']))
         return self
 
-    def add_multiple_products(self, products_list):
-        """
-        Agregar múltiples productos de una vez
-
-        Args:
-            products_list: lista de dicts [{'product_id': 1, 'quantity': 2, 'extras': {...}}]
-        """
-        for item in products_list:
-            self.add_product(
-                product_id=item['product_id'],
-                quantity=item.get('quantity', 1),
-                extras=item.get('extras', {})
-            )
-
-        return self
+    def _iter_items(self):
+        """Recorrer todas las filas de la orden"""
+        return chain.from_iterable(self._items.values())
 
     def remove_product(self, product_id):
         """Remover producto de la orden"""
-        original_length = len(self._items)
-        self._items = [item for item in self._items if item['product_id'] != product_id]
+        removed_items = self._items.pop(product_id, ())
+        for item in removed_items:
+            self._running_total_cents -= item['subtotal_cents']
 
-        removed = original_length - len(self._items)
+        removed = len(removed_items)
         if removed > 0:
-            print(f"[BUILDER] Producto {product_id} removido ({removed} items)")
+            logger.debug("[BUILDER] Producto %s removido (%s items)", product_id, removed)
 
         return self
 
@@ -154,11 +210,12 @@ class OrderBuilder:
         if new_quantity <= 0:
             return self.remove_product(product_id)
 
-        for item in self._items:
-            if item['product_id'] == product_id:
-                item['quantity'] = new_quantity
-                item['subtotal'] = item['unit_price'] * new_quantity
-                print(f"[BUILDER] Cantidad actualizada: {item['decorated_name']} -> {new_quantity}")
+        for item in self._items.get(product_id, ()):
+            subtotal_cents = item['unit_price_cents'] * new_quantity
+            self._running_total_cents += subtotal_cents - item['subtotal_cents']
+            item['quantity'] = new_quantity
+            item['subtotal_cents'] = subtotal_cents
+            logger.debug("[BUILDER] Cantidad actualizada: %s -> %s", item['decorated_name'], new_quantity)
 
         return self
 
@@ -170,13 +227,13 @@ class OrderBuilder:
             instructions: str con instrucciones
         """
         self._special_instructions = instructions
-        print(f"[BUILDER] Instrucciones especiales: {instructions}")
+        logger.debug("[BUILDER] Instrucciones especiales: %s", instructions)
         return self
 
     def clear_special_instructions(self):
         """Limpiar instrucciones especiales"""
         self._special_instructions = ""
-        print("[BUILDER] Instrucciones especiales limpiadas")
+        logger.debug("[BUILDER] Instrucciones especiales limpiadas")
         return self
 
     def validate(self):
@@ -198,25 +255,26 @@ class OrderBuilder:
         if not self._items:
             errors.append("La orden debe tener al menos un producto")
 
-        # Validar disponibilidad de productos
-        for item in self._items:
-            product = item['product']
-            if not product.is_available:
-                errors.append(f"Producto '{product.name}' no está disponible")
+        # Validar disponibilidad contra la base de datos (una sola consulta):
+        # un producto pudo desactivarse después de agregarlo
+        if self._items:
+            unavailable = Product.objects.filter(
+                id__in=self._items, is_available=False
+            ).values_list('name', flat=True)
+            errors.extend(f"Producto '{name}' no está disponible" for name in unavailable)
 
         self._validated = len(errors) == 0
 
         if self._validated:
-            print("[BUILDER] ✓ Validación exitosa")
+            logger.debug("[BUILDER] ✓ Validación exitosa")
         else:
-            print(f"[BUILDER] ✗ Errores de validación: {errors}")
+            logger.debug("[BUILDER] ✗ Errores de validación: %s", errors)
 
         return self._validated, errors
 
     def get_total(self):
-        """Calcular total de la orden"""
-        total = sum(item['subtotal'] for item in self._items)
-        return total
+        """Total de la orden (se mantiene al agregar/quitar/editar items)"""
+        return _from_cents(self._running_total_cents)
 
     def get_summary(self):
         """
@@ -229,59 +287,71 @@ class OrderBuilder:
             'customer': self._customer.username if self._customer else None,
             'mesero': self._mesero.username if self._mesero else None,
             'table': self._table_number,
-            'items_count': len(self._items),
+            'items_count': sum(map(len, self._items.values())),
             'items': [
                 {
                     'name': item['decorated_name'],
                     'quantity': item['quantity'],
-                    'unit_price': float(item['unit_price']),
-                    'subtotal': float(item['subtotal'])
+                    'unit_price': item['unit_price_cents'] / 100,
+                    'subtotal': item['subtotal_cents'] / 100
                 }
-                for item in self._items
+                for item in self._iter_items()
             ],
             'special_instructions': self._special_instructions,
-            'total': float(self.get_total()),
+            'total': self._running_total_cents / 100,
             'validated': self._validated
         }
 
+    @transaction.atomic
     def build(self):
         """
-        Construye y guarda la orden.
+        Construye y guarda la orden (todas las escrituras en una transacción).
         """
         is_valid, errors = self.validate()
         if not is_valid:
             raise ValueError(f"Orden inválida: {', '.join(errors)}")
 
-        print("[BUILDER] Construyendo orden...")
+        logger.debug("[BUILDER] Construyendo orden...")
 
-        # Crear orden con los nuevos campos
+        # Preparar items (mismos valores que OrderItem.save) y el total
+        order_items = []
+        total_cents = 0
+        for item_data in self._iter_items():
+            product = item_data['product']
+            unit_price_cents = item_data['unit_price_cents']
+            extras_price_cents = _to_cents(product.get_extras_price(item_data['extras']))
+            subtotal_cents = (unit_price_cents + extras_price_cents) * item_data['quantity']
+            total_cents += subtotal_cents
+
+            order_items.append(OrderItem(
+                product=product,
+                quantity=item_data['quantity'],
+                unit_price=_from_cents(unit_price_cents),
+                extras=item_data['extras'],
+                extras_price=_from_cents(extras_price_cents),
+                subtotal=_from_cents(subtotal_cents)
+            ))
+
+        # Crear orden con el total ya calculado (sin UPDATE posterior)
         order = Order.objects.create(
             customer=self._customer,
             customer_name=self._customer_name,   # NUEVO
             mesero=self._mesero,
             table_number=self._table_number,
             special_instructions=self._special_instructions,
-            status='PENDIENTE'
+            status='PENDIENTE',
+            total_price=_from_cents(total_cents)
         )
 
-        print(f"[BUILDER] Orden #{order.id} creada")
-
-        # Agregar items (igual que antes)
-        for item_data in self._items:
-            order_item = OrderItem.objects.create(
-                order=order,
-                product=item_data['product'],
-                quantity=item_data['quantity'],
-                unit_price=item_data['unit_price'],
-                extras=item_data['extras']
-            )
-            order_item.calculate_subtotal()
+        logger.debug("[BUILDER] Orden #%s creada", order.id)
 
-            print(f"[BUILDER] Item agregado: {item_data['decorated_name']} x{item_data['quantity']}")
+        # Agregar items en un solo INSERT
+        for order_item in order_items:
+            order_item.order = order
+            logger.debug("[BUILDER] Item agregado: %s x%s", order_item.product.name, order_item.quantity)
 
-        # Calcular total
-        order.calculate_total()
-        print(f"[BUILDER] ✓ Total final: ${order.total_price}")
+        OrderItem.objects.bulk_create(order_items)
+        logger.debug("[BUILDER] ✓ Total final: $%s", order.total_price)
 
         return order
 
@@ -307,7 +377,7 @@ class OrderDirector:
         Returns:
             Order
         """
-        print("[DIRECTOR] Construyendo orden simple de café...")
+        logger.debug("[DIRECTOR] Construyendo orden simple de café...")
 
         return (self.builder
                 .reset()
@@ -330,7 +400,7 @@ class OrderDirector:
         Returns:
             Order
         """
-        print("[DIRECTOR] Construyendo combo de desayuno...")
+        logger.debug("[DIRECTOR] Construyendo combo de desayuno...")
 
         return (self.builder
                 .reset()
@@ -353,7 +423,7 @@ class OrderDirector:
         Returns:
             Order
         """
-        print("[DIRECTOR] Construyendo orden para llevar...")
+        logger.debug("[DIRECTOR] Construyendo orden para llevar...")
 
         self.builder.reset()
         self.builder.set_customer(customer)
@@ -379,7 +449,7 @@ class OrderDirector:
         Returns:
             Order
         """
-        print("[DIRECTOR] Construyendo orden para grupo...")
+        logger.debug("[DIRECTOR] Construyendo orden para grupo...")
 
         return (self.builder
                 .reset()
@@ -402,7 +472,7 @@ class OrderDirector:
         Returns:
             Order
         """
-        print("[DIRECTOR] Construyendo orden personalizada...")
+        logger.debug("[DIRECTOR] Construyendo orden personalizada...")
 
         self.builder.reset()
 
@@ -2,19 +2,39 @@
 COMMAND: Encapsular acciones sobre órdenes con historial y undo/redo
 """
 from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
 from datetime import datetime
-from apps.orders.models import Order, OrderItem, OrderHistory
+import time
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.orders.models import Order, OrderItem
+from apps.orders.history import record_history
 from apps.menu.models import Product
 from apps.menu.decorators.product_decorator import DecoratorFactory
 from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class Command(ABC):
     """Command abstracto con soporte para undo/redo"""
 
     def __init__(self):
-        self.executed_at = None
-        self.undone_at = None
+        # Hora de pared como float; el datetime solo se arma al consultarlo
+        self._executed_ts = None
+        self._undone_ts = None
+        self._undoable = False
+
+    @property
+    def executed_at(self):
+        return datetime.fromtimestamp(self._executed_ts) if self._executed_ts is not None else None
+
+    @property
+    def undone_at(self):
+        return datetime.fromtimestamp(self._undone_ts) if self._undone_ts is not None else None
 
     @abstractmethod
     def execute(self):
@@ -31,9 +51,34 @@ class Command(ABC):
         """Registrar en historial"""
         pass
 
+    def _mark_executed(self):
+        self._executed_ts = time.time()
+        self._undoable = True
+
+    def _mark_undone(self):
+        self._undone_ts = time.time()
+        self._undoable = False
+
     def can_undo(self):
         """Verificar si se puede deshacer"""
-        return self.executed_at is not None and self.undone_at is None
+        return self._undoable
+
+    # Atributos que pueden retener instancias de modelos (y sus cachés de FK)
+    _RELEASABLE = ('order', 'item', 'customer', 'mesero', 'user', 'previous_data', 'item_data', 'items')
+
+    def release(self):
+        """
+        Soltar las instancias de modelos que retiene el comando
+
+        Lo llama el invoker cuando el comando sale del historial y ya no
+        puede deshacerse ni rehacerse; solo se conserva el id de la orden
+        """
+        order = getattr(self, 'order', None)
+        self.order_id = order.pk if order is not None else None
+
+        for attr in self._RELEASABLE:
+            if attr in self.__dict__:
+                self.__dict__[attr] = None
 
     @abstractmethod
     def get_description(self):
@@ -55,58 +100,75 @@ class CreateOrderCommand(Command):
 
     def execute(self):
         """Crear la orden con todos sus items"""
-        print(f"[COMMAND] Ejecutando CreateOrderCommand...")
-
-        self.order = Order.objects.create(
-            customer=self.customer,
-            table_number=self.table_number,
-            mesero=self.mesero,
-            special_instructions=self.instructions,
-            status='PENDIENTE'
-        )
+        logger.debug("[COMMAND] Ejecutando CreateOrderCommand...")
 
-        # Agregar items con decoradores
+        # 1. Precios con decoradores ANTES de abrir la transacción
+        #    (una consulta de productos, mismos valores que OrderItem.save)
+        products = Product.objects.in_bulk([item['product_id'] for item in self.items])
+        order_items = []
         for item_data in self.items:
-            product = Product.objects.get(id=item_data['product_id'])
+            product = products.get(int(item_data['product_id']))
+            if product is None:
+                raise Product.DoesNotExist(f"Producto {item_data['product_id']} no existe")
+
             extras = item_data.get('extras', {})
+            quantity = item_data.get('quantity', 1)
 
-            # Calcular precio con decoradores
             decorated_info = DecoratorFactory.get_decorated_info(product, extras)
+            unit_price = decorated_info['price']
+            extras_price = product.get_extras_price(extras)
 
-            item = OrderItem.objects.create(
-                order=self.order,
+            order_items.append(OrderItem(
                 product=product,
-                quantity=item_data.get('quantity', 1),
-                unit_price=Decimal(str(decorated_info['price'])),
-                extras=extras
+                quantity=quantity,
+                unit_price=unit_price,
+                extras=extras,
+                extras_price=extras_price,
+                subtotal=(unit_price + extras_price) * quantity
+            ))
+
+        total = sum((item.subtotal for item in order_items), Decimal('0'))
+
+        # 2. Transacción corta: orden (con su total) + un INSERT de items + historial
+        with transaction.atomic():
+            self.order = Order.objects.create(
+                customer=self.customer,
+                table_number=self.table_number,
+                mesero=self.mesero,
+                special_instructions=self.instructions,
+                status='PENDIENTE',
+                total_price=total
             )
-            item.calculate_subtotal()
 
-        self.order.calculate_total()
-        self.executed_at = datetime.now()
-        self.log()
+            for order_item in order_items:
+                order_item.order = self.order
+            OrderItem.objects.bulk_create(order_items, batch_size=500)
 
-        print(f"[COMMAND] ✓ Orden #{self.order.id} creada - Total: ${self.order.total_price}")
+            self._mark_executed()
+            self.log()
+
+        logger.debug("[COMMAND] ✓ Orden #%s creada - Total: $%s", self.order.id, self.order.total_price)
         return self.order
 
+    @transaction.atomic
     def undo(self):
         """Eliminar la orden creada"""
         if not self.can_undo():
             raise Exception("No se puede deshacer este comando")
 
-        print(f"[COMMAND] Deshaciendo CreateOrderCommand - Orden #{self.order.id}")
+        logger.debug("[COMMAND] Deshaciendo CreateOrderCommand - Orden #%s", self.order.id)
 
         order_id = self.order.id
         self.order.delete()
         self.order = None
-        self.undone_at = datetime.now()
+        self._mark_undone()
 
-        print(f"[COMMAND] ✓ Orden #{order_id} eliminada")
+        logger.debug("[COMMAND] ✓ Orden #%s eliminada", order_id)
 
     def log(self):
         """Registrar creación en historial"""
         if self.order:
-            OrderHistory.objects.create(
+            record_history(
                 order=self.order,
                 action='CREATE',
                 new_status=self.order.status,
@@ -129,34 +191,36 @@ class UpdateOrderStatusCommand(Command):
         self.user = user
         self.reason = reason
 
+    @transaction.atomic
     def execute(self):
         """Cambiar estado de la orden"""
-        print(f"[COMMAND] Cambiando estado: {self.previous_status} -> {self.new_status}")
+        logger.debug("[COMMAND] Cambiando estado: %s -> %s", self.previous_status, self.new_status)
 
         self.order.status = self.new_status
 
         # Actualizar timestamps según estado
         if self.new_status == 'EN_PREPARACION':
-            print(f"[COMMAND] Orden #{self.order.id} enviada a cocina")
+            logger.debug("[COMMAND] Orden #%s enviada a cocina", self.order.id)
         elif self.new_status == 'LISTO':
-            self.order.prepared_at = datetime.now()
-            print(f"[COMMAND] Orden #{self.order.id} lista para servir")
+            self.order.prepared_at = timezone.now()
+            logger.debug("[COMMAND] Orden #%s lista para servir", self.order.id)
         elif self.new_status == 'ENTREGADO':
-            self.order.delivered_at = datetime.now()
-            print(f"[COMMAND] Orden #{self.order.id} entregada al cliente")
+            self.order.delivered_at = timezone.now()
+            logger.debug("[COMMAND] Orden #%s entregada al cliente", self.order.id)
 
-        self.order.save()
-        self.executed_at = datetime.now()
+        self.order.save(update_fields=['status', 'prepared_at', 'delivered_at'])
+        self._mark_executed()
         self.log()
 
         return self.order
 
+    @transaction.atomic
     def undo(self):
         """Revertir al estado anterior"""
         if not self.can_undo():
             raise Exception("No se puede deshacer este comando")
 
-        print(f"[COMMAND] Revirtiendo estado: {self.new_status} -> {self.previous_status}")
+        logger.debug("[COMMAND] Revirtiendo estado: %s -> %s", self.new_status, self.previous_status)
 
         self.order.status = self.previous_status
 
@@ -170,14 +234,14 @@ class UpdateOrderStatusCommand(Command):
         elif self.previous_status == 'LISTO':
             self.order.delivered_at = None
 
-        self.order.save()
-        self.undone_at = datetime.now()
+        self.order.save(update_fields=['status', 'prepared_at', 'delivered_at'])
+        self._mark_undone()
 
-        print(f"[COMMAND] ✓ Estado revertido")
+        logger.debug("[COMMAND] ✓ Estado revertido")
 
     def log(self):
         """Registrar cambio de estado"""
-        OrderHistory.objects.create(
+        record_history(
             order=self.order,
             action='STATUS_CHANGE',
             previous_status=self.previous_status,
@@ -201,12 +265,13 @@ class CancelOrderCommand(Command):
         self.previous_status = order.status
         self.previous_data = None
 
+    @transaction.atomic
     def execute(self):
         """Cancelar orden si es posible"""
         if not self.order.can_cancel():
             raise ValueError(f"No se puede cancelar orden en estado {self.order.status}")
 
-        print(f"[COMMAND] Cancelando orden #{self.order.id}")
+        logger.debug("[COMMAND] Cancelando orden #%s", self.order.id)
 
         # Guardar datos antes de cancelar
         self.previous_data = {
@@ -216,33 +281,34 @@ class CancelOrderCommand(Command):
         }
 
         self.order.status = 'CANCELADO'
-        self.order.save()
-        self.executed_at = datetime.now()
+        self.order.save(update_fields=['status'])
+        self._mark_executed()
         self.log()
 
-        print(f"[COMMAND] ✓ Orden #{self.order.id} cancelada - Razón: {self.reason}")
+        logger.debug("[COMMAND] ✓ Orden #%s cancelada - Razón: %s", self.order.id, self.reason)
         return self.order
 
+    @transaction.atomic
     def undo(self):
         """Restaurar orden cancelada"""
         if not self.can_undo():
             raise Exception("No se puede deshacer este comando")
 
-        print(f"[COMMAND] Restaurando orden cancelada #{self.order.id}")
+        logger.debug("[COMMAND] Restaurando orden cancelada #%s", self.order.id)
 
         if self.previous_data:
             self.order.status = self.previous_data['status']
             self.order.prepared_at = self.previous_data['prepared_at']
             self.order.delivered_at = self.previous_data['delivered_at']
-            self.order.save()
+            self.order.save(update_fields=['status', 'prepared_at', 'delivered_at'])
 
-        self.undone_at = datetime.now()
+        self._mark_undone()
 
-        print(f"[COMMAND] ✓ Orden #{self.order.id} restaurada")
+        logger.debug("[COMMAND] ✓ Orden #%s restaurada", self.order.id)
 
     def log(self):
         """Registrar cancelación"""
-        OrderHistory.objects.create(
+        record_history(
             order=self.order,
             action='CANCEL',
             previous_status=self.previous_status,
@@ -258,22 +324,25 @@ class CancelOrderCommand(Command):
 class AddItemCommand(Command):
     """Comando para agregar item a orden existente"""
 
-    def __init__(self, order, product_id, quantity=1, extras=None):
+    def __init__(self, order, product_id, quantity=1, extras=None, product_name=None):
         super().__init__()
         self.order = order
         self.product_id = product_id
         self.quantity = quantity
         self.extras = extras or {}
         self.item = None
+        self._product_name = product_name
 
+    @transaction.atomic
     def execute(self):
         """Agregar item a la orden"""
         if self.order.status not in ['PENDIENTE']:
             raise ValueError(f"No se pueden agregar items a orden en estado {self.order.status}")
 
-        print(f"[COMMAND] Agregando item a orden #{self.order.id}")
+        logger.debug("[COMMAND] Agregando item a orden #%s", self.order.id)
 
         product = Product.objects.get(id=self.product_id)
+        self._product_name = product.name
 
         # Calcular precio con decoradores
         decorated_info = DecoratorFactory.get_decorated_info(product, self.extras)
@@ -282,46 +351,49 @@ class AddItemCommand(Command):
             order=self.order,
             product=product,
             quantity=self.quantity,
-            unit_price=Decimal(str(decorated_info['price'])),
+            unit_price=decorated_info['price'],
             extras=self.extras
         )
         self.item.calculate_subtotal()
 
         self.order.calculate_total()
-        self.executed_at = datetime.now()
+        self._mark_executed()
         self.log()
 
-        print(f"[COMMAND] ✓ Item agregado: {decorated_info['name']} x{self.quantity}")
+        logger.debug("[COMMAND] ✓ Item agregado: %s x%s", decorated_info['name'], self.quantity)
         return self.item
 
+    @transaction.atomic
     def undo(self):
         """Eliminar item agregado"""
         if not self.can_undo():
             raise Exception("No se puede deshacer este comando")
 
-        print(f"[COMMAND] Eliminando item de orden #{self.order.id}")
+        logger.debug("[COMMAND] Eliminando item de orden #%s", self.order.id)
 
         if self.item:
             self.item.delete()
             self.order.calculate_total()
             self.item = None
 
-        self.undone_at = datetime.now()
+        self._mark_undone()
 
-        print("[COMMAND] ✓ Item eliminado")
+        logger.debug("[COMMAND] ✓ Item eliminado")
 
     def log(self):
         """Registrar adición de item"""
-        OrderHistory.objects.create(
+        record_history(
             order=self.order,
             action='ADD_ITEM',
             changed_by=None,
-            reason=f"Item agregado: {self.item.product.name} x{self.quantity}"
+            reason=f"Item agregado: {self._product_name} x{self.quantity}"
         )
 
     def get_description(self):
-        product_name = Product.objects.get(id=self.product_id).name
-        return f"Agregar item: {product_name} x{self.quantity}"
+        # El nombre se consulta una sola vez y queda en el comando
+        if self._product_name is None:
+            self._product_name = Product.objects.values_list('name', flat=True).get(id=self.product_id)
+        return f"Agregar item: {self._product_name} x{self.quantity}"
 
 
 class RemoveItemCommand(Command):
@@ -333,60 +405,65 @@ class RemoveItemCommand(Command):
         self.item_id = item_id
         self.item_data = None
 
+    @transaction.atomic
     def execute(self):
         """Remover item de la orden"""
         if self.order.status not in ['PENDIENTE']:
             raise ValueError(f"No se pueden remover items de orden en estado {self.order.status}")
 
-        print(f"[COMMAND] Removiendo item {self.item_id} de orden #{self.order.id}")
+        logger.debug("[COMMAND] Removiendo item %s de orden #%s", self.item_id, self.order.id)
 
-        item = OrderItem.objects.get(id=self.item_id, order=self.order)
+        item = OrderItem.objects.select_related('product').get(id=self.item_id, order_id=self.order.id)
 
         # Guardar datos para undo
         self.item_data = {
-            'product_id': item.product.id,
+            'product_id': item.product_id,
             'quantity': item.quantity,
             'unit_price': item.unit_price,
             'extras': item.extras,
+            'extras_price': item.extras_price,
+            'subtotal': item.subtotal,
             'product_name': item.product.name
         }
 
         item.delete()
         self.order.calculate_total()
-        self.executed_at = datetime.now()
+        self._mark_executed()
         self.log()
 
-        print(f"[COMMAND] ✓ Item removido: {self.item_data['product_name']}")
+        logger.debug("[COMMAND] ✓ Item removido: %s", self.item_data['product_name'])
         return self.order
 
+    @transaction.atomic
     def undo(self):
         """Restaurar item removido"""
         if not self.can_undo():
             raise Exception("No se puede deshacer este comando")
 
-        print(f"[COMMAND] Restaurando item en orden #{self.order.id}")
+        logger.debug("[COMMAND] Restaurando item en orden #%s", self.order.id)
 
         if self.item_data:
-            product = Product.objects.get(id=self.item_data['product_id'])
-
-            OrderItem.objects.create(
+            # Restaurar con los precios guardados: sin volver a consultar el producto
+            OrderItem.objects.bulk_create([OrderItem(
                 order=self.order,
-                product=product,
+                product_id=self.item_data['product_id'],
                 quantity=self.item_data['quantity'],
                 unit_price=self.item_data['unit_price'],
-                extras=self.item_data['extras']
-            )
+                extras=self.item_data['extras'],
+                extras_price=self.item_data['extras_price'],
+                subtotal=self.item_data['subtotal']
+            )])
 
             self.order.calculate_total()
 
-        self.undone_at = datetime.now()
+        self._mark_undone()
 
-        print("[COMMAND] ✓ Item restaurado")
+        logger.debug("[COMMAND] ✓ Item restaurado")
 
     def log(self):
         """Registrar eliminación"""
         if self.item_data:
-            OrderHistory.objects.create(
+            record_history(
                 order=self.order,
                 action='REMOVE_ITEM',
                 reason=f"Item removido: {self.item_data['product_name']}"
@@ -405,51 +482,62 @@ class UpdateItemQuantityCommand(Command):
         self.item_id = item_id
         self.new_quantity = new_quantity
         self.previous_quantity = None
-        self.item = None
+        self._product_name = None
 
+    def _set_quantity(self, quantity):
+        """Escribir cantidad y subtotal en un solo UPDATE (sin leer-modificar-guardar)"""
+        OrderItem.objects.filter(id=self.item_id, order_id=self.order.id).update(
+            quantity=quantity,
+            subtotal=(F('unit_price') + F('extras_price')) * quantity
+        )
+
+    @transaction.atomic
     def execute(self):
         """Actualizar cantidad del item"""
         if self.order.status not in ['PENDIENTE']:
             raise ValueError(f"No se puede editar orden en estado {self.order.status}")
 
-        print(f"[COMMAND] Actualizando cantidad de item {self.item_id}")
+        logger.debug("[COMMAND] Actualizando cantidad de item %s", self.item_id)
 
-        self.item = OrderItem.objects.get(id=self.item_id, order=self.order)
-        self.previous_quantity = self.item.quantity
+        # Solo se leen la cantidad anterior (para undo) y el nombre (para el historial)
+        self.previous_quantity, self._product_name = (
+            OrderItem.objects.filter(id=self.item_id, order_id=self.order.id)
+            .values_list('quantity', 'product__name')
+            .get()
+        )
 
-        self.item.quantity = self.new_quantity
-        self.item.calculate_subtotal()
+        self._set_quantity(self.new_quantity)
 
         self.order.calculate_total()
-        self.executed_at = datetime.now()
+        self._mark_executed()
         self.log()
 
-        print(f"[COMMAND] ✓ Cantidad actualizada: {self.previous_quantity} -> {self.new_quantity}")
-        return self.item
+        logger.debug("[COMMAND] ✓ Cantidad actualizada: %s -> %s", self.previous_quantity, self.new_quantity)
+        return self.order
 
+    @transaction.atomic
     def undo(self):
         """Revertir cantidad"""
         if not self.can_undo():
             raise Exception("No se puede deshacer este comando")
 
-        print(f"[COMMAND] Revirtiendo cantidad: {self.new_quantity} -> {self.previous_quantity}")
+        logger.debug("[COMMAND] Revirtiendo cantidad: %s -> %s", self.new_quantity, self.previous_quantity)
 
-        if self.item:
-            self.item.quantity = self.previous_quantity
-            self.item.calculate_subtotal()
+        if self.previous_quantity is not None:
+            self._set_quantity(self.previous_quantity)
             self.order.calculate_total()
 
-        self.undone_at = datetime.now()
+        self._mark_undone()
 
-        print("[COMMAND] ✓ Cantidad revertida")
+        logger.debug("[COMMAND] ✓ Cantidad revertida")
 
     def log(self):
         """Registrar actualización"""
-        if self.item:
-            OrderHistory.objects.create(
+        if self._product_name is not None:
+            record_history(
                 order=self.order,
                 action='UPDATE_QUANTITY',
-                reason=f"Cantidad actualizada: {self.item.product.name} - {self.previous_quantity} -> {self.new_quantity}"
+                reason=f"Cantidad actualizada: {self._product_name} - {self.previous_quantity} -> {self.new_quantity}"
             )
 
     def get_description(self):
@@ -463,8 +551,9 @@ class CommandInvoker:
     """
 
     def __init__(self, max_history=50):
-        self._history = []
-        self._current = -1
+        # Pila de deshacer acotada (descarta lo más antiguo) y pila de rehacer
+        self._undo = deque(maxlen=max_history)
+        self._redo = []
         self.max_history = max_history
 
     def execute_command(self, command: Command):
@@ -477,100 +566,118 @@ class CommandInvoker:
         Returns:
             resultado del comando
         """
-        print(f"[INVOKER] Ejecutando: {command.get_description()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[INVOKER] Ejecutando: %s", command.get_description())
 
         result = command.execute()
 
-        # Limpiar historial futuro si estamos en medio
-        self._history = self._history[:self._current + 1]
+        # Un comando nuevo invalida lo que se podía rehacer
+        self._release_all(self._redo)
+        self._redo.clear()
 
-        # Agregar comando
-        self._history.append(command)
-        self._current += 1
+        evicted = self._undo[0] if len(self._undo) == self._undo.maxlen else None
+        self._undo.append(command)
 
-        # Limitar tamaño del historial
-        if len(self._history) > self.max_history:
-            removed = self._history.pop(0)
-            self._current -= 1
-            print(f"[INVOKER] Comando antiguo removido del historial")
+        if evicted is not None:
+            evicted.release()
+            logger.debug("[INVOKER] Comando antiguo removido del historial")
 
-        print(f"[INVOKER] ✓ Comando ejecutado - Posición en historial: {self._current + 1}/{len(self._history)}")
+        logger.debug("[INVOKER] ✓ Comando ejecutado - Posición en historial: %s/%s", len(self._undo), len(self._undo) + len(self._redo))
         return result
 
     def undo(self):
         """Deshacer último comando"""
-        if self._current >= 0:
-            command = self._history[self._current]
+        if self._undo:
+            command = self._undo[-1]
 
             if not command.can_undo():
-                print(f"[INVOKER] ✗ No se puede deshacer: {command.get_description()}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("[INVOKER] ✗ No se puede deshacer: %s", command.get_description())
                 return False
 
-            print(f"[INVOKER] Deshaciendo: {command.get_description()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[INVOKER] Deshaciendo: %s", command.get_description())
             command.undo()
-            self._current -= 1
+            self._redo.append(self._undo.pop())
 
-            print(f"[INVOKER] ✓ Comando deshecho - Posición: {self._current + 1}/{len(self._history)}")
+            logger.debug("[INVOKER] ✓ Comando deshecho - Posición: %s/%s", len(self._undo), len(self._undo) + len(self._redo))
             return True
 
-        print("[INVOKER] ✗ No hay comandos para deshacer")
+        logger.debug("[INVOKER] ✗ No hay comandos para deshacer")
         return False
 
     def redo(self):
         """Rehacer comando"""
-        if self._current < len(self._history) - 1:
-            self._current += 1
-            command = self._history[self._current]
+        if self._redo:
+            command = self._redo[-1]
 
-            print(f"[INVOKER] Rehaciendo: {command.get_description()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[INVOKER] Rehaciendo: %s", command.get_description())
             command.execute()
+            self._undo.append(self._redo.pop())
 
-            print(f"[INVOKER] ✓ Comando rehecho - Posición: {self._current + 1}/{len(self._history)}")
+            logger.debug("[INVOKER] ✓ Comando rehecho - Posición: %s/%s", len(self._undo), len(self._undo) + len(self._redo))
             return True
 
-        print("[INVOKER] ✗ No hay comandos para rehacer")
+        logger.debug("[INVOKER] ✗ No hay comandos para rehacer")
         return False
 
-    def get_history(self):
-        """Obtener historial de comandos ejecutados"""
-        return [
-            {
+    def iter_history(self, limit=None):
+        """
+        Recorrer el historial de comandos ejecutados sin armarlo completo
+
+        Args:
+            limit: máximo de entradas a generar (None = todas)
+        """
+        for cmd in islice(self._undo, limit):
+            yield {
                 'description': cmd.get_description(),
                 'executed_at': cmd.executed_at.isoformat() if cmd.executed_at else None,
                 'undone_at': cmd.undone_at.isoformat() if cmd.undone_at else None,
                 'can_undo': cmd.can_undo()
             }
-            for cmd in self._history[:self._current + 1]
-        ]
+
+    def get_history(self):
+        """Obtener historial de comandos ejecutados"""
+        return list(self.iter_history())
 
     def get_undo_stack(self):
         """Obtener comandos que pueden deshacerse"""
         return [
             cmd.get_description()
-            for cmd in self._history[:self._current + 1]
+            for cmd in self._undo
             if cmd.can_undo()
         ]
 
     def get_redo_stack(self):
-        """Obtener comandos que pueden rehacerse"""
+        """Obtener comandos que pueden rehacerse (el próximo primero)"""
         return [
             cmd.get_description()
-            for cmd in self._history[self._current + 1:]
+            for cmd in reversed(self._redo)
         ]
 
+    @staticmethod
+    def _release_all(commands):
+        """Soltar las instancias retenidas por comandos que salen del historial"""
+        for cmd in commands:
+            cmd.release()
+
     def clear_history(self):
         """Limpiar historial completo"""
-        self._history = []
-        self._current = -1
-        print("[INVOKER] Historial limpiado")
+        self._release_all(self._undo)
+        self._release_all(self._redo)
+        self._undo.clear()
+        self._redo.clear()
+        logger.debug("[INVOKER] Historial limpiado")
 
     def get_stats(self):
         """Obtener estadísticas del invoker"""
         return {
-            'total_commands': len(self._history),
-            'current_position': self._current + 1,
-            'can_undo': self._current >= 0,
-            'can_redo': self._current < len(self._history) - 1,
-            'undo_available': len(self.get_undo_stack()),
-            'redo_available': len(self.get_redo_stack())
+            'total_commands': len(self._undo) + len(self._redo),
+            'current_position': len(self._undo),
+            'can_undo': bool(self._undo),
+            'can_redo': bool(self._redo),
+            # Contar sin armar descripciones (pueden consultar la base de datos)
+            'undo_available': sum(1 for cmd in self._undo if cmd.can_undo()),
+            'redo_available': len(self._redo)
         }
\ No newline at end of file
@@ -3,6 +3,7 @@ Patrón FACTORY METHOD para crear órdenes según tipo
 """
 from abc import ABC, abstractmethod
 from apps.orders.models import Order, OrderItem
+from apps.menu.models import Product
 
 
 class OrderFactory(ABC):
@@ -13,16 +14,30 @@ class OrderFactory(ABC):
         pass
 
     def add_items(self, order, items_data):
-        """Método común para agregar items"""
+        """Método común para agregar items (una consulta de productos, un INSERT)"""
+        products = Product.objects.in_bulk([item['product_id'] for item in items_data])
+
+        order_items = []
         for item_data in items_data:
-            item = OrderItem(
+            product = products.get(int(item_data['product_id']))
+            if product is None:
+                raise Product.DoesNotExist(f"Producto {item_data['product_id']} no existe")
+
+            extras = item_data.get('extras', {})
+            quantity = item_data.get('quantity', 1)
+            extras_price = product.get_extras_price(extras)
+
+            order_items.append(OrderItem(
                 order=order,
-                product_id=item_data['product_id'],
-                quantity=item_data.get('quantity', 1),
-                extras=item_data.get('extras', {})
-            )
-            item.calculate_subtotal()
-            item.save()
+                product=product,
+                quantity=quantity,
+                unit_price=product.base_price,
+                extras=extras,
+                extras_price=extras_price,
+                subtotal=(product.base_price + extras_price) * quantity
+            ))
+
+        OrderItem.objects.bulk_create(order_items, batch_size=500)
 
         order.calculate_total()
         return order
@@ -66,11 +81,15 @@ class DeliveryOrderFactory(OrderFactory):
         return order
 
 
+# Las factories no tienen estado: una instancia de cada una basta
+_FACTORIES = {
+    'dine_in': DineInOrderFactory(),
+    'take_away': TakeAwayOrderFactory(),
+    'delivery': DeliveryOrderFactory(),
+}
+_DEFAULT_FACTORY = _FACTORIES['dine_in']
+
+
 def get_order_factory(order_type):
     """Obtener factory según tipo de orden"""
-    factories = {
-        'dine_in': DineInOrderFactory(),
-        'take_away': TakeAwayOrderFactory(),
-        'delivery': DeliveryOrderFactory(),
-    }
-    return factories.get(order_type, DineInOrderFactory())
\ No newline at end of file
+    return _FACTORIES.get(order_type, _DEFAULT_FACTORY)
\ No newline at end of file
@@ -2,10 +2,24 @@
 MEMENTO: Guardar y restaurar estados completos de órdenes
 Sistema de snapshots con compresión y gestión de memoria
 """
+from collections import deque
 from datetime import datetime
 import json
+import logging
+import pickle
+import struct
+import time
+import zlib
 from decimal import Decimal
 
+logger = logging.getLogger(__name__)
+
+# order_id (int64), crc del estado (uint32), total (double), cantidad de items (uint32)
+_CHECKSUM_FORMAT = struct.Struct('<qIdI')
+
+# Mementos descartados por el caretaker, listos para reutilizarse
+_MEMENTO_POOL = deque(maxlen=1024)
+
 
 class OrderMemento:
     """
@@ -13,72 +27,240 @@ class OrderMemento:
     Inmutable después de creación
     """
 
+    __slots__ = (
+        '_order_id', '_status', '_total_price',
+        '_items_snapshot', '_items_count', '_items_blob', '_compressed',
+        '_metadata', '_timestamp_ns', '_timestamp', '_timestamp_iso',
+        '_integrity_payload', '_checksum', '_state', '_json',
+    )
+
     def __init__(self, order_id, status, total_price, items_snapshot, metadata=None):
+        self._reinit(order_id, status, total_price, items_snapshot, metadata)
+
+    @classmethod
+    def acquire(cls, order_id, status, total_price, items_snapshot, metadata=None):
+        """Obtener un memento del pool, o crear uno nuevo si está vacío"""
+        try:
+            memento = _MEMENTO_POOL.pop()
+        except IndexError:
+            return cls(order_id, status, total_price, items_snapshot, metadata)
+
+        memento._reinit(order_id, status, total_price, items_snapshot, metadata)
+        return memento
+
+    def release(self):
+        """
+        Devolver el memento al pool
+        Solo debe llamarlo quien tiene la única referencia (el caretaker al descartarlo)
+        """
+        self._items_snapshot = None
+        self._items_blob = None
+        self._metadata = None
+        self._state = None
+        self._json = None
+        _MEMENTO_POOL.append(self)
+
+    def _reinit(self, order_id, status, total_price, items_snapshot, metadata=None):
         self._order_id = order_id
         self._status = status
         self._total_price = float(total_price)
         self._items_snapshot = items_snapshot
+        self._items_count = len(items_snapshot)
+        self._items_blob = None
+        self._compressed = False
         self._metadata = metadata or {}
-        self._timestamp = datetime.now()
-        self._checksum = self._calculate_checksum()
+        self._timestamp_ns = time.time_ns()
+        self._timestamp = None  # datetime y texto ISO se calculan al pedirlos
+        self._timestamp_iso = None
+        self._integrity_payload = self._pack_integrity_payload()
+        self._checksum = zlib.crc32(self._integrity_payload)
 
-    def _calculate_checksum(self):
-        """Calcular checksum simple para validación"""
-        data = f"{self._order_id}{self._status}{self._total_price}{len(self._items_snapshot)}"
-        return hash(data)
+        # Al ser inmutable, el estado se arma una sola vez (al primer get_state)
+        self._state = None
+        self._json = None
 
-    def get_state(self):
-        """Obtener estado completo del memento"""
+    def _build_state(self, items):
         return {
             'order_id': self._order_id,
             'status': self._status,
             'total_price': self._total_price,
-            'items': self._items_snapshot,
+            'items': items,
             'metadata': self._metadata,
-            'timestamp': self._timestamp.isoformat(),
+            'timestamp': self.get_timestamp_iso(),
             'checksum': self._checksum
         }
 
+    def _pack_integrity_payload(self):
+        """Empaquetar los campos que cubre el checksum CRC32 (estable entre procesos para poder exportarlo)"""
+        return _CHECKSUM_FORMAT.pack(
+            self._order_id,
+            zlib.crc32(self._status.encode()),
+            self._total_price,
+            self._items_count
+        )
+
+    def compress(self):
+        """
+        Comprimir los items del snapshot para ahorrar memoria
+        Se usa en snapshots que ya no son el más reciente
+        """
+        if self._compressed:
+            return
+
+        self._items_blob = zlib.compress(pickle.dumps(self._items_snapshot, protocol=5), 1)
+        self._items_snapshot = None
+        self._state = None
+        self._compressed = True
+
+    def get_items(self):
+        """Items del snapshot, descomprimidos si hace falta"""
+        if self._compressed:
+            return pickle.loads(zlib.decompress(self._items_blob))
+        return self._items_snapshot
+
+    def get_state(self):
+        """Obtener estado completo del memento (no modificar el dict devuelto)"""
+        if self._compressed:
+            return self._build_state(self.get_items())
+        if self._state is None:
+            self._state = self._build_state(self._items_snapshot)
+        return self._state
+
     def get_order_id(self):
         return self._order_id
 
     def get_status(self):
         return self._status
 
+    def get_metadata(self):
+        return self._metadata
+
     def get_timestamp(self):
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(self._timestamp_ns / 1e9)
         return self._timestamp
 
+    def get_timestamp_ns(self):
+        return self._timestamp_ns
+
+    def get_timestamp_iso(self):
+        if self._timestamp_iso is None:
+            self._timestamp_iso = self.get_timestamp().isoformat()
+        return self._timestamp_iso
+
     def get_total_price(self):
         return self._total_price
 
     def get_items_count(self):
-        return len(self._items_snapshot)
+        return self._items_count
 
     def is_valid(self):
         """Verificar integridad del memento"""
-        expected_checksum = hash(
-            f"{self._order_id}{self._status}{self._total_price}{len(self._items_snapshot)}"
-        )
-        return self._checksum == expected_checksum
+        return zlib.crc32(self._integrity_payload) == self._checksum
+
+    def to_json(self):
+        """Resumen y metadata en JSON, codificado una sola vez"""
+        if self._json is None:
+            self._json = json.dumps(
+                {**self.get_summary(), 'metadata': self._metadata},
+                default=str
+            )
+        return self._json
 
     def get_summary(self):
         """Resumen compacto del memento"""
         return {
-            'timestamp': self._timestamp.isoformat(),
+            'timestamp': self.get_timestamp_iso(),
             'status': self._status,
             'total': self._total_price,
-            'items_count': len(self._items_snapshot),
+            'items_count': self._items_count,
             'valid': self.is_valid()
         }
 
 
+def _items_with_product(order):
+    """Items de la orden con su producto: reutiliza los precargados o los trae en un JOIN"""
+    if 'items' in getattr(order, '_prefetched_objects_cache', {}):
+        return order.items.all()
+    return order.items.select_related('product')
+
+
+def _snapshot_order(order, tag="", reason=""):
+    """
+    Crear un OrderMemento a partir de una orden
+
+    Usa los items prefetcheados si la orden viene con
+    prefetch_related('items__product'); si no, _items_with_product hace
+    una sola consulta con select_related('product')
+    """
+    logger.debug("[MEMENTO] Creando snapshot de orden #%s", order.id)
+
+    float_ = float
+    items_snapshot = [
+        {
+            'product_id': item.product_id,
+            'product_name': item.product.name,
+            'quantity': item.quantity,
+            'unit_price': float_(item.unit_price),
+            'extras': item.extras,
+            'extras_price': float_(item.extras_price),
+            'subtotal': float_(item.subtotal)
+        }
+        for item in _items_with_product(order)
+    ]
+
+    # Metadata adicional (una sola lectura de cada relación)
+    customer = order.customer
+    mesero = order.mesero
+    prepared_at = order.prepared_at
+    delivered_at = order.delivered_at
+
+    if customer is not None:
+        customer_id, customer_name = customer.id, customer.username
+    else:
+        customer_id = customer_name = None
+
+    if mesero is not None:
+        mesero_id, mesero_name = mesero.id, mesero.username
+    else:
+        mesero_id = mesero_name = None
+
+    metadata = {
+        'tag': tag,
+        'reason': reason,
+        'customer_id': customer_id,
+        'customer_name': customer_name,
+        'mesero_id': mesero_id,
+        'mesero_name': mesero_name,
+        'table_number': order.table_number,
+        'special_instructions': order.special_instructions,
+        'created_at': order.created_at.isoformat(),
+        'prepared_at': prepared_at.isoformat() if prepared_at else None,
+        'delivered_at': delivered_at.isoformat() if delivered_at else None
+    }
+
+    memento = OrderMemento.acquire(
+        order_id=order.id,
+        status=order.status,
+        total_price=order.total_price,
+        items_snapshot=items_snapshot,
+        metadata=metadata
+    )
+
+    logger.debug("[MEMENTO] ✓ Snapshot creado - Items: %s, Total: $%s", len(items_snapshot), order.total_price)
+    return memento
+
+
 class OrderOriginator:
     """
     Originator que crea y restaura mementos de órdenes
     """
 
+    __slots__ = ('_order', '_summary')
+
     def __init__(self, order):
         self._order = order
+        self._summary = None  # get_state_summary cacheado mientras viva el originator
 
     def create_memento(self, tag="", reason=""):
         """
@@ -91,46 +273,7 @@ class OrderOriginator:
         Returns:
             OrderMemento con estado actual
         """
-        print(f"[MEMENTO] Creando snapshot de orden #{self._order.id}")
-
-        # Capturar estado completo de items
-        items_snapshot = []
-        for item in self._order.items.all():
-            items_snapshot.append({
-                'product_id': item.product.id,
-                'product_name': item.product.name,
-                'quantity': item.quantity,
-                'unit_price': float(item.unit_price),
-                'extras': item.extras,
-                'extras_price': float(item.extras_price),
-                'subtotal': float(item.subtotal)
-            })
-
-        # Metadata adicional
-        metadata = {
-            'tag': tag,
-            'reason': reason,
-            'customer_id': self._order.customer.id,
-            'customer_name': self._order.customer.username,
-            'mesero_id': self._order.mesero.id if self._order.mesero else None,
-            'mesero_name': self._order.mesero.username if self._order.mesero else None,
-            'table_number': self._order.table_number,
-            'special_instructions': self._order.special_instructions,
-            'created_at': self._order.created_at.isoformat(),
-            'prepared_at': self._order.prepared_at.isoformat() if self._order.prepared_at else None,
-            'delivered_at': self._order.delivered_at.isoformat() if self._order.delivered_at else None
-        }
-
-        memento = OrderMemento(
-            order_id=self._order.id,
-            status=self._order.status,
-            total_price=self._order.total_price,
-            items_snapshot=items_snapshot,
-            metadata=metadata
-        )
-
-        print(f"[MEMENTO] ✓ Snapshot creado - Items: {len(items_snapshot)}, Total: ${self._order.total_price}")
-        return memento
+        return _snapshot_order(self._order, tag, reason)
 
     def restore_from_memento(self, memento: OrderMemento):
         """
@@ -142,7 +285,7 @@ class OrderOriginator:
         if not memento.is_valid():
             raise ValueError("Memento corrupto - checksum inválido")
 
-        print(f"[MEMENTO] Restaurando orden #{self._order.id} desde snapshot")
+        logger.debug("[MEMENTO] Restaurando orden #%s desde snapshot", self._order.id)
 
         state = memento.get_state()
 
@@ -151,24 +294,27 @@ class OrderOriginator:
         self._order.total_price = Decimal(str(state['total_price']))
 
         # Restaurar metadata
-        metadata = state['metadata']
+        metadata = memento.get_metadata()
         self._order.table_number = metadata.get('table_number', self._order.table_number)
         self._order.special_instructions = metadata.get('special_instructions', '')
 
-        self._order.save()
+        self._order.save(update_fields=['status', 'total_price', 'table_number', 'special_instructions'])
+        self._summary = None
 
-        print(f"[MEMENTO] ✓ Orden restaurada - Estado: {state['status']}, Total: ${state['total_price']}")
+        logger.debug("[MEMENTO] ✓ Orden restaurada - Estado: %s, Total: $%s", state['status'], state['total_price'])
 
     def get_state_summary(self):
-        """Resumen del estado actual"""
-        return {
-            'id': self._order.id,
-            'status': self._order.status,
-            'total': float(self._order.total_price),
-            'items_count': self._order.items.count(),
-            'table': self._order.table_number,
-            'customer': self._order.customer.username
-        }
+        """Resumen del estado actual (se calcula una vez por originator)"""
+        if self._summary is None:
+            self._summary = {
+                'id': self._order.id,
+                'status': self._order.status,
+                'total': float(self._order.total_price),
+                'items_count': self._order.items.count(),
+                'table': self._order.table_number,
+                'customer': self._order.customer.username
+            }
+        return self._summary
 
     def compare_with_memento(self, memento: OrderMemento):
         """
@@ -178,7 +324,11 @@ class OrderOriginator:
             dict con diferencias
         """
         current_state = self.get_state_summary()
-        memento_state = memento.get_state()
+        memento_state = {
+            'status': memento.get_status(),
+            'total_price': memento.get_total_price(),
+            'items_count': memento.get_items_count()
+        }
 
         differences = {}
 
@@ -194,10 +344,10 @@ class OrderOriginator:
                 'memento': memento_state['total_price']
             }
 
-        if current_state['items_count'] != len(memento_state['items']):
+        if current_state['items_count'] != memento_state['items_count']:
             differences['items_count'] = {
                 'current': current_state['items_count'],
-                'memento': len(memento_state['items'])
+                'memento': memento_state['items_count']
             }
 
         return differences
@@ -210,7 +360,8 @@ class OrderCaretaker:
     """
 
     def __init__(self, max_snapshots_per_order=10):
-        self._mementos = {}  # {order_id: [(tag, memento), ...]}
+        self._mementos = {}  # {order_id: deque([(tag, memento), ...], maxlen=max)}
+        self._by_tag = {}  # {order_id: {tag: memento}}
         self.max_snapshots_per_order = max_snapshots_per_order
 
     def save(self, order, tag="", reason=""):
@@ -222,21 +373,35 @@ class OrderCaretaker:
             tag: etiqueta identificadora
             reason: razón del snapshot
         """
-        originator = OrderOriginator(order)
-        memento = originator.create_memento(tag=tag, reason=reason)
+        memento = _snapshot_order(order, tag, reason)
 
-        if order.id not in self._mementos:
-            self._mementos[order.id] = []
+        snapshots = self._mementos.get(order.id)
+        if snapshots is None:
+            snapshots = self._mementos[order.id] = deque(maxlen=self.max_snapshots_per_order)
+
+        by_tag = self._by_tag.setdefault(order.id, {})
+
+        # Al llegar al límite el deque descarta el más antiguo
+        removed_memento = None
+        if len(snapshots) == snapshots.maxlen:
+            removed_tag, removed_memento = snapshots[0]
+            if by_tag.get(removed_tag) is removed_memento:
+                del by_tag[removed_tag]
+            logger.debug("[CARETAKER] Snapshot antiguo removido: %s", removed_tag)
+
+        # Solo el más reciente queda sin comprimir
+        if snapshots:
+            snapshots[-1][1].compress()
 
         # Agregar memento
-        self._mementos[order.id].append((tag or f"snapshot_{len(self._mementos[order.id])}", memento))
+        saved_tag = tag or f"snapshot_{len(snapshots)}"
+        snapshots.append((saved_tag, memento))
+        by_tag[saved_tag] = memento
 
-        # Limitar cantidad de snapshots
-        if len(self._mementos[order.id]) > self.max_snapshots_per_order:
-            removed_tag, removed_memento = self._mementos[order.id].pop(0)
-            print(f"[CARETAKER] Snapshot antiguo removido: {removed_tag}")
+        if removed_memento is not None:
+            removed_memento.release()
 
-        print(f"[CARETAKER] Snapshot guardado - Orden #{order.id}, Tag: {tag}, Total snapshots: {len(self._mementos[order.id])}")
+        logger.debug("[CARETAKER] Snapshot guardado - Orden #%s, Tag: %s, Total snapshots: %s", order.id, tag, len(self._mementos[order.id]))
 
     def restore(self, order, tag=""):
         """
@@ -250,17 +415,16 @@ class OrderCaretaker:
             dict con estado restaurado o None
         """
         if order.id not in self._mementos:
-            print(f"[CARETAKER] No hay snapshots para orden #{order.id}")
+            logger.debug("[CARETAKER] No hay snapshots para orden #%s", order.id)
             return None
 
-        # Buscar memento por tag
-        for saved_tag, memento in self._mementos[order.id]:
-            if saved_tag == tag:
-                originator = OrderOriginator(order)
-                originator.restore_from_memento(memento)
-                return memento.get_state()
+        memento = self._by_tag[order.id].get(tag)
+        if memento is not None:
+            originator = OrderOriginator(order)
+            originator.restore_from_memento(memento)
+            return memento.get_state()
 
-        print(f"[CARETAKER] Tag '{tag}' no encontrado para orden #{order.id}")
+        logger.debug("[CARETAKER] Tag '%s' no encontrado para orden #%s", tag, order.id)
         return None
 
     def get_history(self, order_id):
@@ -280,7 +444,7 @@ class OrderCaretaker:
         for tag, memento in self._mementos[order_id]:
             summary = memento.get_summary()
             summary['tag'] = tag
-            summary['metadata'] = memento.get_state()['metadata']
+            summary['metadata'] = memento.get_metadata()
             history.append(summary)
 
         return history
@@ -291,29 +455,25 @@ class OrderCaretaker:
             return None
 
         tag, memento = self._mementos[order_id][-1]
-        state = memento.get_state()
-        state['tag'] = tag
-        return state
+        return {**memento.get_state(), 'tag': tag}
 
     def get_by_tag(self, order_id, tag):
         """Obtener snapshot específico por tag"""
-        if order_id not in self._mementos:
+        memento = self._by_tag.get(order_id, {}).get(tag)
+        if memento is None:
             return None
 
-        for saved_tag, memento in self._mementos[order_id]:
-            if saved_tag == tag:
-                state = memento.get_state()
-                state['tag'] = saved_tag
-                return state
-
-        return None
+        return {**memento.get_state(), 'tag': tag}
 
     def clear_history(self, order_id):
         """Limpiar historial de una orden"""
         if order_id in self._mementos:
-            count = len(self._mementos[order_id])
-            del self._mementos[order_id]
-            print(f"[CARETAKER] Historial limpiado para orden #{order_id} - {count} snapshots removidos")
+            snapshots = self._mementos.pop(order_id)
+            del self._by_tag[order_id]
+            count = len(snapshots)
+            for _, memento in snapshots:
+                memento.release()
+            logger.debug("[CARETAKER] Historial limpiado para orden #%s - %s snapshots removidos", order_id, count)
 
     def clear_old_snapshots(self, days=7):
         """
@@ -322,26 +482,25 @@ class OrderCaretaker:
         Args:
             days: días de antigüedad para eliminar
         """
-        from datetime import timedelta
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff_ns = time.time_ns() - days * 86400 * 10**9
 
         removed_count = 0
         for order_id, snapshots in list(self._mementos.items()):
-            filtered = [
-                (tag, memento)
-                for tag, memento in snapshots
-                if memento.get_timestamp() > cutoff_date
-            ]
-
-            removed = len(snapshots) - len(filtered)
-            removed_count += removed
-
-            if filtered:
-                self._mementos[order_id] = filtered
-            else:
+            by_tag = self._by_tag[order_id]
+
+            # Los snapshots se agregan en orden cronológico: los vencidos están al inicio
+            while snapshots and snapshots[0][1].get_timestamp_ns() <= cutoff_ns:
+                tag, memento = snapshots.popleft()
+                if by_tag.get(tag) is memento:
+                    del by_tag[tag]
+                memento.release()
+                removed_count += 1
+
+            if not snapshots:
                 del self._mementos[order_id]
+                del self._by_tag[order_id]
 
-        print(f"[CARETAKER] Limpieza completada - {removed_count} snapshots antiguos removidos")
+        logger.debug("[CARETAKER] Limpieza completada - %s snapshots antiguos removidos", removed_count)
 
     def get_stats(self):
         """Obtener estadísticas del caretaker"""
@@ -354,15 +513,25 @@ class OrderCaretaker:
             'orders_with_snapshots': list(self._mementos.keys())
         }
 
-    def export_history(self, order_id):
+    def export_history(self, order_id, indent=None):
         """
         Exportar historial en formato JSON
 
+        Args:
+            order_id: ID de la orden
+            indent: sangría opcional; sin ella se reutiliza el JSON ya codificado de cada memento
+
         Returns:
             str JSON con historial completo
         """
-        history = self.get_history(order_id)
-        return json.dumps(history, indent=2, default=str)
+        if indent is not None:
+            return json.dumps(self.get_history(order_id), indent=indent, default=str)
+
+        dumps = json.dumps
+        return '[' + ','.join(
+            f'{{"tag": {dumps(tag)}, {memento.to_json()[1:]}'
+            for tag, memento in self._mementos.get(order_id, ())
+        ) + ']'
 
 
 # Singleton global del Caretaker
@@ -2,13 +2,42 @@
 STATE: Gestión completa del ciclo de vida de órdenes
 Con validaciones, transiciones automáticas y notificaciones
 """
+import logging
 from abc import ABC, abstractmethod
-from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.services import NotificationService
+from apps.orders.models import Order
+from apps.orders.patterns.memento import get_caretaker
+
+logger = logging.getLogger(__name__)
+
+
+def _after_commit(order, tag, reason, notify=None):
+    """
+    Notificar y guardar el snapshot cuando la transacción confirme
+
+    Si la transición se revierte no se avisa a nadie ni queda un snapshot
+    de un estado que nunca existió. Fuera de una transacción corre al instante.
+    """
+    def _apply():
+        if notify is not None:
+            notify(order)
+        get_caretaker().save(order, tag=tag, reason=reason)
+
+    transaction.on_commit(_apply)
 
 
 class OrderState(ABC):
     """Estado abstracto de una orden con validaciones"""
 
+    __slots__ = ()
+
+    # Cada estado concreto define su nombre (el valor de Order.status)
+    _NAME = None
+
     @abstractmethod
     def handle(self, order):
         """Acciones al entrar en este estado"""
@@ -35,7 +64,7 @@ class OrderState(ABC):
 
     def get_name(self):
         """Nombre del estado"""
-        return self.__class__.__name__.replace('State', '').replace('Order', '')
+        return self._NAME
 
     def get_allowed_actions(self):
         """Acciones permitidas en este estado"""
@@ -59,20 +88,25 @@ class PendingState(OrderState):
     Cliente puede editar/cancelar libremente
     """
 
+    __slots__ = ()
+    _NAME = Order.Status.PENDIENTE
+
     def handle(self, order):
         """Marcar como pendiente"""
-        print(f"[STATE] Orden #{order.id} → PENDIENTE")
-        order.status = 'PENDIENTE'
-        order.save()
+        # Idempotente: si ya está en este estado no se escribe ni se notifica de nuevo
+        if order.status == self._NAME:
+            return
+
+        logger.debug("[STATE] Orden #%s → PENDIENTE", order.id)
+        order.status = self._NAME
+        order.save(update_fields=['status'])
 
         # Crear snapshot automático
-        from apps.orders.patterns.memento import get_caretaker
-        caretaker = get_caretaker()
-        caretaker.save(order, tag="pending", reason="Orden creada")
+        _after_commit(order, tag="pending", reason="Orden creada")
 
     def next_state(self):
         """Siguiente: En Preparación"""
-        return InPreparationState()
+        return _state(Order.Status.EN_PREPARACION)
 
     def can_cancel(self):
         return True
@@ -80,9 +114,6 @@ class PendingState(OrderState):
     def can_edit(self):
         return True
 
-    def get_name(self):
-        return 'PENDIENTE'
-
 
 class InPreparationState(OrderState):
     """
@@ -90,26 +121,31 @@ class InPreparationState(OrderState):
     Se puede cancelar pero NO editar
     """
 
+    __slots__ = ()
+    _NAME = Order.Status.EN_PREPARACION
+
     def handle(self, order):
         """Enviar a cocina"""
-        print(f"[STATE] Orden #{order.id} → EN_PREPARACION")
-        order.status = 'EN_PREPARACION'
-        order.save()
+        # Idempotente
+        if order.status == self._NAME:
+            return
 
-        # Notificar a cocina (Observer)
-        from apps.notifications.services import NotificationService
-        NotificationService.notify_kitchen(order)
+        logger.debug("[STATE] Orden #%s → EN_PREPARACION", order.id)
+        order.status = self._NAME
+        order.save(update_fields=['status'])
 
-        # Crear snapshot
-        from apps.orders.patterns.memento import get_caretaker
-        caretaker = get_caretaker()
-        caretaker.save(order, tag="in_preparation", reason="Enviada a cocina")
+        # Notificar a cocina (Observer) y crear snapshot
+        _after_commit(
+            order, tag="in_preparation", reason="Enviada a cocina",
+            notify=NotificationService.notify_kitchen
+        )
 
-        print(f"[STATE] ✓ Orden #{order.id} enviada a cocina - {order.items.count()} items")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[STATE] ✓ Orden #%s enviada a cocina - %s items", order.id, order.items.count())
 
     def next_state(self):
         """Siguiente: Listo"""
-        return ReadyState()
+        return _state(Order.Status.LISTO)
 
     def can_cancel(self):
         return True
@@ -119,13 +155,10 @@ class InPreparationState(OrderState):
 
     def validate_transition(self, order, next_state):
         """Validar que hay items antes de avanzar"""
-        if order.items.count() == 0:
+        if not order.items.exists():
             raise ValueError("La orden no tiene items")
         return True
 
-    def get_name(self):
-        return 'EN_PREPARACION'
-
 
 class ReadyState(OrderState):
     """
@@ -133,27 +166,31 @@ class ReadyState(OrderState):
     NO se puede cancelar ni editar
     """
 
+    __slots__ = ()
+    _NAME = Order.Status.LISTO
+
     def handle(self, order):
         """Marcar como lista"""
-        print(f"[STATE] Orden #{order.id} → LISTO")
-        order.status = 'LISTO'
-        order.prepared_at = datetime.now()
-        order.save()
+        # Idempotente
+        if order.status == self._NAME:
+            return
 
-        # Notificar a mesero (Observer)
-        from apps.notifications.services import NotificationService
-        NotificationService.notify_waiter(order)
+        logger.debug("[STATE] Orden #%s → LISTO", order.id)
+        order.status = self._NAME
+        order.prepared_at = timezone.now()
+        order.save(update_fields=['status', 'prepared_at'])
 
-        # Crear snapshot
-        from apps.orders.patterns.memento import get_caretaker
-        caretaker = get_caretaker()
-        caretaker.save(order, tag="ready", reason="Orden lista para servir")
+        # Notificar a mesero y cliente (Observer) y crear snapshot
+        _after_commit(
+            order, tag="ready", reason="Orden lista para servir",
+            notify=NotificationService.notify_order_ready
+        )
 
-        print(f"[STATE] ✓ Orden #{order.id} lista para servir")
+        logger.debug("[STATE] ✓ Orden #%s lista para servir", order.id)
 
     def next_state(self):
         """Siguiente: Entregado"""
-        return DeliveredState()
+        return _state(Order.Status.ENTREGADO)
 
     def can_cancel(self):
         return False  # Ya no se puede cancelar
@@ -161,9 +198,6 @@ class ReadyState(OrderState):
     def can_edit(self):
         return False
 
-    def get_name(self):
-        return 'LISTO'
-
 
 class DeliveredState(OrderState):
     """
@@ -171,19 +205,24 @@ class DeliveredState(OrderState):
     Estado final - NO se puede modificar
     """
 
+    __slots__ = ()
+    _NAME = Order.Status.ENTREGADO
+
     def handle(self, order):
         """Marcar como entregada"""
-        print(f"[STATE] Orden #{order.id} → ENTREGADO")
-        order.status = 'ENTREGADO'
-        order.delivered_at = datetime.now()
-        order.save()
+        # Idempotente
+        if order.status == self._NAME:
+            return
+
+        logger.debug("[STATE] Orden #%s → ENTREGADO", order.id)
+        order.status = self._NAME
+        order.delivered_at = timezone.now()
+        order.save(update_fields=['status', 'delivered_at'])
 
         # Snapshot final
-        from apps.orders.patterns.memento import get_caretaker
-        caretaker = get_caretaker()
-        caretaker.save(order, tag="delivered", reason="Orden entregada al cliente")
+        _after_commit(order, tag="delivered", reason="Orden entregada al cliente")
 
-        print(f"[STATE] ✓ Orden #{order.id} completada exitosamente")
+        logger.debug("[STATE] ✓ Orden #%s completada exitosamente", order.id)
 
     def next_state(self):
         """Estado final - no hay siguiente"""
@@ -195,9 +234,6 @@ class DeliveredState(OrderState):
     def can_edit(self):
         return False
 
-    def get_name(self):
-        return 'ENTREGADO'
-
 
 class CancelledState(OrderState):
     """
@@ -205,18 +241,23 @@ class CancelledState(OrderState):
     Estado final - NO se puede modificar
     """
 
+    __slots__ = ()
+    _NAME = Order.Status.CANCELADO
+
     def handle(self, order):
         """Marcar como cancelada"""
-        print(f"[STATE] Orden #{order.id} → CANCELADO")
-        order.status = 'CANCELADO'
-        order.save()
+        # Idempotente
+        if order.status == self._NAME:
+            return
+
+        logger.debug("[STATE] Orden #%s → CANCELADO", order.id)
+        order.status = self._NAME
+        order.save(update_fields=['status'])
 
         # Snapshot de cancelación
-        from apps.orders.patterns.memento import get_caretaker
-        caretaker = get_caretaker()
-        caretaker.save(order, tag="cancelled", reason="Orden cancelada")
+        _after_commit(order, tag="cancelled", reason="Orden cancelada")
 
-        print(f"[STATE] ✓ Orden #{order.id} cancelada")
+        logger.debug("[STATE] ✓ Orden #%s cancelada", order.id)
 
     def next_state(self):
         """Estado final - no hay siguiente"""
@@ -228,8 +269,10 @@ class CancelledState(OrderState):
     def can_edit(self):
         return False
 
-    def get_name(self):
-        return 'CANCELADO'
+
+def _state(name):
+    """Instancia compartida de un estado (se resuelve en tiempo de llamada, después de definir OrderStateManager)"""
+    return OrderStateManager.STATES[name]
 
 
 class OrderStateManager:
@@ -238,21 +281,34 @@ class OrderStateManager:
     Coordina transiciones y validaciones
     """
 
-    # Mapeo de estados
+    # Mapeo de estados: una instancia por estado, compartida
+    # (sin atributos gracias a __slots__ = (), así que no hay estado que compartir entre hilos)
     STATES = {
-        'PENDIENTE': PendingState(),
-        'EN_PREPARACION': InPreparationState(),
-        'LISTO': ReadyState(),
-        'ENTREGADO': DeliveredState(),
-        'CANCELADO': CancelledState(),
+        state._NAME: state()
+        for state in (PendingState, InPreparationState, ReadyState, DeliveredState, CancelledState)
     }
+    _DEFAULT_STATE = STATES[Order.Status.PENDIENTE]
 
     @classmethod
     def get_state(cls, order):
         """Obtener estado actual de una orden"""
-        return cls.STATES.get(order.status, PendingState())
+        return cls.STATES.get(order.status, cls._DEFAULT_STATE)
+
+    @staticmethod
+    def _lock(order):
+        """
+        Bloquear la fila de la orden hasta el fin de la transacción
+        y tomar su estado actual (evita aplicar dos veces la misma transición)
+        """
+        order.status = (
+            Order.objects.select_for_update()
+            .filter(pk=order.pk)
+            .values_list('status', flat=True)
+            .get()
+        )
 
     @classmethod
+    @transaction.atomic
     def advance_order(cls, order):
         """
         Avanzar orden al siguiente estado con validaciones
@@ -263,41 +319,44 @@ class OrderStateManager:
         Returns:
             nuevo estado
         """
+        cls._lock(order)
         current_state = cls.get_state(order)
         next_state = current_state.next_state()
 
         if next_state is None:
             raise ValueError(f"La orden está en estado final: {order.status}")
 
-        print(f"[STATE MANAGER] Avanzando orden #{order.id}: {current_state.get_name()} → {next_state.get_name()}")
+        logger.debug("[STATE MANAGER] Avanzando orden #%s: %s → %s", order.id, current_state.get_name(), next_state.get_name())
 
         # Validar transición
         try:
             current_state.validate_transition(order, next_state)
         except ValueError as e:
-            print(f"[STATE MANAGER] ✗ Transición inválida: {e}")
+            logger.debug("[STATE MANAGER] ✗ Transición inválida: %s", e)
             raise
 
         # Aplicar nuevo estado
         next_state.handle(order)
 
-        print(f"[STATE MANAGER] ✓ Orden #{order.id} avanzada exitosamente")
+        logger.debug("[STATE MANAGER] ✓ Orden #%s avanzada exitosamente", order.id)
         return next_state
 
     @classmethod
+    @transaction.atomic
     def cancel_order(cls, order, reason=""):
         """Cancelar orden si es posible"""
+        cls._lock(order)
         current_state = cls.get_state(order)
 
         if not current_state.can_cancel():
             raise ValueError(f"No se puede cancelar orden en estado {order.status}")
 
-        print(f"[STATE MANAGER] Cancelando orden #{order.id} - Razón: {reason}")
+        logger.debug("[STATE MANAGER] Cancelando orden #%s - Razón: %s", order.id, reason)
 
-        cancelled_state = CancelledState()
+        cancelled_state = cls.STATES[Order.Status.CANCELADO]
         cancelled_state.handle(order)
 
-        print(f"[STATE MANAGER] ✓ Orden #{order.id} cancelada")
+        logger.debug("[STATE MANAGER] ✓ Orden #%s cancelada", order.id)
         return cancelled_state
 
     @classmethod
@@ -328,13 +387,25 @@ class OrderStateManager:
     def get_state_info(cls, order):
         """Obtener información completa del estado"""
         current_state = cls.get_state(order)
+        nxt = current_state.next_state()
+        can_advance = nxt is not None
+        can_cancel = current_state.can_cancel()
+        can_edit = current_state.can_edit()
+
+        allowed_actions = []
+        if can_advance:
+            allowed_actions.append('advance')
+        if can_cancel:
+            allowed_actions.append('cancel')
+        if can_edit:
+            allowed_actions.append('edit')
 
         return {
             'order_id': order.id,
             'current_state': current_state.get_name(),
-            'can_advance': cls.can_advance(order),
-            'can_cancel': cls.can_cancel(order),
-            'can_edit': cls.can_edit(order),
-            'allowed_actions': current_state.get_allowed_actions(),
-            'next_state': current_state.next_state().get_name() if current_state.next_state() else None
+            'can_advance': can_advance,
+            'can_cancel': can_cancel,
+            'can_edit': can_edit,
+            'allowed_actions': allowed_actions,
+            'next_state': nxt.get_name() if can_advance else None
         }
\ No newline at end of file
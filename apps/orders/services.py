@@ -1,6 +1,9 @@
 """
 Servicios para gestión de órdenes
 """
+from django.db.models import FloatField, Prefetch
+from django.db.models.functions import Cast
+
 from .models import Order, OrderItem
 from .patterns.factory import get_order_factory
 from .patterns.builder import OrderBuilder
@@ -51,12 +54,8 @@ class OrderService:
         if instructions:
             builder.add_special_instructions(instructions)
 
-        for item in items:
-            builder.add_product(
-                item['product_id'],
-                item.get('quantity', 1),
-                item.get('extras', {})
-            )
+        # Una consulta para todos los productos; build() inserta los items con bulk_create
+        builder.add_multiple_products(items)
 
         order = builder.build()
 
@@ -74,7 +73,11 @@ class OrderService:
     def advance_order(self, order_id):
         """Avanzar orden al siguiente estado"""
         try:
-            order = Order.objects.get(id=order_id)
+            # Los snapshots (antes y después), la validación y las notificaciones
+            # reutilizan el cliente, el mesero y los items con su producto ya cargados
+            order = Order.objects.select_related('customer', 'mesero').prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+            ).get(id=order_id)
 
             # Guardar estado antes de cambiar
             self.caretaker.save(order, tag=f"before_{order.status}")
@@ -89,7 +92,10 @@ class OrderService:
     def cancel_order(self, order_id, reason="", user=None):
         """Cancelar orden usando Command"""
         try:
-            order = Order.objects.get(id=order_id)
+            # CancelOrderCommand solo lee y escribe el estado y sus marcas de tiempo
+            order = Order.objects.only(
+                'id', 'status', 'prepared_at', 'delivered_at'
+            ).get(id=order_id)
             command = CancelOrderCommand(order, reason, user)
             return self.command_invoker.execute_command(command)
         except Order.DoesNotExist:
@@ -102,7 +108,7 @@ class OrderService:
     def restore_order_state(self, order_id, tag="initial"):
         """Restaurar orden a un estado anterior"""
         try:
-            order = Order.objects.get(id=order_id)
+            order = Order.objects.select_related('customer', 'mesero').get(id=order_id)
             state = self.caretaker.restore(order, tag)
 
             if state:
@@ -129,26 +135,35 @@ class OrderService:
     def get_order_details(self, order_id):
         """Obtener detalles completos de una orden"""
         try:
-            order = Order.objects.get(id=order_id)
-            return {
-                'id': order.id,
-                'customer': order.customer.username,
-                'mesero': order.mesero.username if order.mesero else None,
-                'table': order.table_number,
-                'status': order.status,
-                'total': float(order.total_price),
-                'items': [
-                    {
-                        'product': item.product.name,
-                        'quantity': item.quantity,
-                        'unit_price': float(item.unit_price),
-                        'extras': item.extras,
-                        'subtotal': float(item.subtotal)
-                    }
-                    for item in order.items.all()
-                ],
-                'created_at': order.created_at.isoformat(),
-                'special_instructions': order.special_instructions
-            }
+            order = Order.objects.select_related('customer', 'mesero').get(id=order_id)
         except Order.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
+
+        # Items como tuplas, con los importes ya convertidos a float en la BD
+        items = OrderItem.objects.filter(order_id=order.id).values_list(
+            'product__name', 'quantity',
+            Cast('unit_price', output_field=FloatField()),
+            'extras',
+            Cast('subtotal', output_field=FloatField())
+        )
+
+        return {
+            'id': order.id,
+            'customer': order.customer.username,
+            'mesero': order.mesero.username if order.mesero else None,
+            'table': order.table_number,
+            'status': order.status,
+            'total': float(order.total_price),
+            'items': [
+                {
+                    'product': product_name,
+                    'quantity': quantity,
+                    'unit_price': unit_price,
+                    'extras': extras,
+                    'subtotal': subtotal
+                }
+                for product_name, quantity, unit_price, extras, subtotal in items
+            ],
+            'created_at': order.created_at.isoformat(),
+            'special_instructions': order.special_instructions
+        }
\ No newline at end of file
@@ -1,9 +1,12 @@
 """
 Vistas para órdenes
 """
+from django.db.models import FloatField
+from django.db.models.functions import Cast
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
 from .models import Order
 from .services import OrderService
 
@@ -29,10 +32,11 @@ class CreateOrderView(APIView):
         try:
             from apps.users.models import User
 
-            customer = User.objects.get(id=request.data['customer_id'])
+            # El Builder solo valida el rol y registra el username
+            customer = User.objects.only('id', 'username', 'role').get(id=request.data['customer_id'])
             mesero = None
             if 'mesero_id' in request.data:
-                mesero = User.objects.get(id=request.data['mesero_id'])
+                mesero = User.objects.only('id', 'username', 'role').get(id=request.data['mesero_id'])
 
             service = OrderService()
             order = service.create_order_with_builder(
@@ -48,7 +52,7 @@ class CreateOrderView(APIView):
                 'status': order.status,
                 'table': order.table_number,
                 'total': float(order.total_price),
-                'items_count': order.items.count()
+                'items_count': len(request.data['items'])  # el Builder crea una fila por item
             }, status=status.HTTP_201_CREATED)
 
         except User.DoesNotExist:
@@ -93,7 +97,7 @@ class CancelOrderView(APIView):
             reason = request.data.get('reason', '')
             user = None
             if 'user_id' in request.data:
-                user = User.objects.get(id=request.data['user_id'])
+                user = User.objects.only('id', 'username', 'role').get(id=request.data['user_id'])
 
             service = OrderService()
             order = service.cancel_order(order_id, reason, user)
@@ -147,7 +151,9 @@ class OrderDetailView(APIView):
 
 
 class OrderListView(APIView):
-    """Listar órdenes según estado"""
+    """Listar órdenes según estado, paginadas con ?page= (paginación por defecto del proyecto)"""
+
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
 
     def get(self, request):
         status_filter = request.query_params.get('status', None)
@@ -163,15 +169,25 @@ class OrderListView(APIView):
         else:
             orders = Order.objects.all().order_by('-created_at')
 
-        data = []
-        for order in orders:
-            data.append({
-                'id': order.id,
-                'customer': order.customer.username,
-                'table': order.table_number,
-                'status': order.status,
-                'total': float(order.total_price),
-                'created_at': order.created_at.isoformat()
-            })
-
-        return Response(data)
\ No newline at end of file
+        # Solo las columnas de la respuesta, en tuplas; el total ya llega como float desde la BD
+        rows = orders.values_list(
+            'id', 'customer__username', 'table_number', 'status',
+            Cast('total_price', output_field=FloatField()), 'created_at'
+        )
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(rows, request, view=self)
+
+        data = [
+            {
+                'id': order_id,
+                'customer': customer,
+                'table': table,
+                'status': order_status,
+                'total': total,
+                'created_at': created_at.isoformat()
+            }
+            for order_id, customer, table, order_status, total, created_at in page
+        ]
+
+        return paginator.get_paginated_response(data)
\ No newline at end of file
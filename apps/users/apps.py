@@ -7,4 +7,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
-    verbose_name = 'Usuarios'
\ No newline at end of file
+    verbose_name = 'Usuarios'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,10 +1,18 @@
 """
 Modelo de usuarios con roles
 """
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
 
 
+class UserManager(BaseUserManager):
+    """Manager de usuarios: los superusuarios se crean con rol ADMIN"""
+
+    def create_superuser(self, username, email=None, password=None, **extra_fields):
+        extra_fields.setdefault('role', 'ADMIN')
+        return super().create_superuser(username, email, password, **extra_fields)
+
+
 class User(AbstractUser):
     """
     Usuario extendido con roles para el sistema de cafetería
@@ -25,6 +33,8 @@ class User(AbstractUser):
 
     phone = models.CharField(max_length=15, blank=True)
 
+    objects = UserManager()
+
     class Meta:
         db_table = 'users'
         verbose_name = 'Usuario'
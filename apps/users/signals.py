@@ -0,0 +1,16 @@
+"""
+Señales de usuarios
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .views import CHEFS_CACHE_KEY, WAITERS_CACHE_KEY
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_role_lists(sender, **kwargs):
+    """Invalidar los listados cacheados de meseros y cocineros"""
+    cache.delete_many([WAITERS_CACHE_KEY, CHEFS_CACHE_KEY])
@@ -1,12 +1,25 @@
 """
 Vistas para usuarios
 """
+from django.core.cache import cache
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import User
 from .serializers import UserSerializer, UserDetailSerializer
 
+# Listados planos de solo lectura: values() con los mismos campos del serializer
+LIST_FIELDS = UserSerializer.Meta.fields
+
+# Meseros y cocineros cambian poco; se cachean y se invalidan al guardar/borrar usuarios (ver signals.py)
+WAITERS_CACHE_KEY = 'users:waiters'
+CHEFS_CACHE_KEY = 'users:chefs'
+ROLE_LIST_TIMEOUT = 60  # segundos
+
+
+def _role_list(role):
+    return list(User.objects.filter(role=role).values(*LIST_FIELDS))
+
 
 class UserListView(APIView):
     """Listar todos los usuarios"""
@@ -19,8 +32,7 @@ class UserListView(APIView):
         else:
             users = User.objects.all()
 
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        return Response(list(users.values(*LIST_FIELDS)))
 
 
 class UserDetailView(APIView):
@@ -42,15 +54,13 @@ class WaiterListView(APIView):
     """Listar meseros"""
 
     def get(self, request):
-        waiters = User.objects.filter(role='MESERO')
-        serializer = UserSerializer(waiters, many=True)
-        return Response(serializer.data)
+        waiters = cache.get_or_set(WAITERS_CACHE_KEY, lambda: _role_list('MESERO'), ROLE_LIST_TIMEOUT)
+        return Response(waiters)
 
 
 class ChefListView(APIView):
     """Listar cocineros"""
 
     def get(self, request):
-        chefs = User.objects.filter(role='COCINERO')
-        serializer = UserSerializer(chefs, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        chefs = cache.get_or_set(CHEFS_CACHE_KEY, lambda: _role_list('COCINERO'), ROLE_LIST_TIMEOUT)
+        return Response(chefs)
\ No newline at end of file
@@ -66,6 +66,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reutilizar la conexión entre peticiones (segundos)
+        'CONN_MAX_AGE': config('DJANGO_MAX_CONN_AGE', default=60, cast=int),
+        # Verificar la conexión reutilizada antes de cada petición
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {
+            # Sin valor, sqlite usa una base en memoria (se migra en cada corrida).
+            # Con un archivo, `manage.py test --keepdb` reutiliza el esquema ya migrado
+            'NAME': config('TEST_DB_NAME', default=None),
+        },
     }
 }
 
@@ -110,6 +119,9 @@ REST_FRAMEWORK = {
 # Custom User Model - MUY IMPORTANTE
 AUTH_USER_MODEL = 'users.User'
 
+# Historial de órdenes: escribirlo después del commit, fuera de la transacción
+ORDERS_ASYNC_HISTORY = config('ORDERS_ASYNC_HISTORY', default=False, cast=bool)
+
 # Logging (opcional pero útil para debug)
 LOGGING = {
     'version': 1,
@@ -118,9 +130,22 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'notifications_queue': {
+            '()': 'apps.notifications.log_queue.queue_handler',
+        },
     },
     'root': {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    'loggers': {
+        'apps.notifications': {
+            'handlers': ['notifications_queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'apps.orders': {
+            'level': config('ORDERS_LOG_LEVEL', default='INFO'),
+        },
+    },
 }
\ No newline at end of file
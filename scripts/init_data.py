@@ -1,245 +1,87 @@
 """
 Script para inicializar datos de prueba del sistema Cafetería del Bosque
 Ejecutar: python manage.py shell < scripts/init_data.py
+
+Los datos viven en el fixture apps/core/fixtures/seed.json. El script lo
+lee y crea solo lo que falta: no pisa usuarios existentes ni usa las pk
+fijas del fixture.
 """
 
+from django.conf import settings
+from django.core import serializers
+from django.db import transaction
+
 from apps.users.models import User
 from apps.menu.models import Category, Product
 from apps.kitchen.models import KitchenStation
 
-print("=" * 60)
-print(" Inicializando datos del sistema Cafetería del Bosque ")
-print("=" * 60)
-
-# ==========================================================
-# 1. CREAR USUARIOS
-# ==========================================================
-print("\n1) Creando usuarios...\n")
-
-# --- Superusuario (admin del sistema) ---
-if not User.objects.filter(username='admin').exists():
-    admin = User.objects.create_superuser(
-        username="admin",
-        email="admin@cafedelbosque.com",
-        password="admin123"
-    )
-    admin.role = "ADMIN"
-    admin.save()
-    print("✓ Superusuario creado")
-else:
-    print("✓ Superusuario ya existe")
-
-# --- Meseros ---
-meseros_data = [
-    ("maria_mesera", "María", "González", "maria@cafedelbosque.com"),
-    ("juan_mesero", "Juan", "Pérez", "juan@cafedelbosque.com"),
-]
-
-for username, fname, lname, email in meseros_data:
-    user, created = User.objects.get_or_create(
-        username=username,
-        defaults={
-            "first_name": fname,
-            "last_name": lname,
-            "email": email,
-            "role": "MESERO"
-        }
-    )
-    user.set_password("mesero123")
-    user.save()
-
-print("✓ Meseros creados")
-
-# --- Cocineros ---
-cocineros_data = [
-    ("carlos_chef", "Carlos", "Rodríguez", "carlos@cafedelbosque.com"),
-    ("laura_chef", "Laura", "Ramírez", "laura@cafedelbosque.com"),
-]
-
-for username, fname, lname, email in cocineros_data:
-    user, created = User.objects.get_or_create(
-        username=username,
-        defaults={
-            "first_name": fname,
-            "last_name": lname,
-            "email": email,
-            "role": "COCINERO"
-        }
-    )
-    user.set_password("chef123")
-    user.save()
-
-print("✓ Cocineros creados")
-
-# --- Clientes ---
-clientes_data = [
-    ("ana_cliente", "Ana", "Martínez", "ana@email.com"),
-    ("pedro_cliente", "Pedro", "López", "pedro@email.com"),
-    ("sofia_cliente", "Sofía", "Ramírez", "sofia@email.com"),
-]
-
-for username, fname, lname, email in clientes_data:
-    user, created = User.objects.get_or_create(
-        username=username,
-        defaults={
-            "first_name": fname,
-            "last_name": lname,
-            "email": email,
-            "role": "CLIENTE"
-        }
-    )
-    user.set_password("cliente123")
-    user.save()
-
-print("✓ Clientes creados")
-
-
-# ==========================================================
-# 2. CATEGORÍAS DEL MENÚ
-# ==========================================================
-print("\n2) Creando categorías...\n")
-
-cat_bebidas_c = Category.objects.get_or_create(
-    name="Bebidas Calientes",
-    defaults={"category_type": "BEBIDAS", "description": "Café, té y chocolate caliente"}
-)[0]
-
-cat_bebidas_f = Category.objects.get_or_create(
-    name="Bebidas Frías",
-    defaults={"category_type": "BEBIDAS", "description": "Jugos y bebidas refrescantes"}
-)[0]
-
-cat_entradas = Category.objects.get_or_create(
-    name="Entradas",
-    defaults={"category_type": "ENTRADAS", "description": "Panes, snacks y acompañamientos"}
-)[0]
-
-cat_comidas = Category.objects.get_or_create(
-    name="Comidas",
-    defaults={"category_type": "COMIDAS", "description": "Platos principales"}
-)[0]
+FIXTURE = settings.BASE_DIR / "apps" / "core" / "fixtures" / "seed.json"
 
-cat_postres = Category.objects.get_or_create(
-    name="Postres",
-    defaults={"category_type": "POSTRES", "description": "Dulces y postres caseros"}
-)[0]
 
-print("✓ Categorías creadas")
-
-
-# ==========================================================
-# 3. PRODUCTOS — MENÚ BASE
-# ==========================================================
-print("\n3) Creando productos...\n")
-
-productos = [
-    # Bebidas calientes
-    ("Café Americano", cat_bebidas_c, "Café negro tradicional", 3.50, 3,
-     {"leche": 0.5, "azucar": 0, "extra_shot": 1.0}, None),
-
-    ("Cappuccino", cat_bebidas_c, "Café con leche espumosa", 4.50, 5,
-     {"leche_vegetal": 0.5, "jarabe_vainilla": 0.3}, None),
-
-    ("Chocolate Caliente", cat_bebidas_c, "Chocolate artesanal", 4.00, 4,
-     {"crema": 0.5, "marshmallows": 0.3}, None),
-
-    # Bebidas frías
-    ("Jugo de Naranja Natural", cat_bebidas_f, "Jugo recién exprimido", 3.00, 2, {}, None),
-    ("Batido de Fresa", cat_bebidas_f, "Cremoso y dulce", 5.00, 4,
-     {"proteina": 1.0, "extra_fruta": 0.5}, None),
-
-    # Entradas
-    ("Croissant", cat_entradas, "Croissant clásico", 2.50, 2, {}, None),
-    ("Pan con Mantequilla", cat_entradas, "Pan tostado artesanal", 1.50, 3, {}, None),
-
-    # Comidas
-    ("Sandwich de Pollo", cat_comidas, "Pollo a la plancha con vegetales", 8.00, 10,
-     {"queso": 0.5, "aguacate": 1}, None),
-
-    ("Ensalada César", cat_comidas, "Clásica con aderezo César", 7.50, 8,
-     {"pollo": 2}, None),
-
-    # Postres
-    ("Cheesecake", cat_postres, "Tarta de queso", 5.50, 2, {}, None),
-    ("Brownie con Helado", cat_postres, "Brownie caliente con bola de vainilla", 6.00, 5,
-     {"extra_helado": 1.0}, None),
-]
-
-for name, cat, desc, price, prep, extras, season in productos:
-    Product.objects.get_or_create(
-        name=name,
-        category=cat,
-        defaults={
-            "description": desc,
-            "base_price": price,
-            "preparation_time": prep,
-            "available_extras": extras,
-            "season": season
-        }
+def bulk_create_missing(model, objs, key="name"):
+    """
+    Insertar en un solo bulk_create los objetos cuya clave aún no existe
+    (una consulta para ver los existentes + un INSERT), manteniendo el script idempotente
+    """
+    existing = set(
+        model.objects.filter(**{f"{key}__in": [getattr(obj, key) for obj in objs]})
+        .values_list(key, flat=True)
     )
-
-print("✓ Productos del menú base creados")
+    missing = [obj for obj in objs if getattr(obj, key) not in existing]
+    model.objects.bulk_create(missing, batch_size=500)
+    return len(missing)
 
 
-# ==========================================================
-# 4. PRODUCTOS DE TEMPORADA (estrategia)
-# ==========================================================
-print("\n4) Creando productos de temporada...\n")
-
-productos_temp = [
-    ("Latte de Calabaza", cat_bebidas_c, "Bebida típica de otoño", 4.80, 5,
-     {"crema": 0.3}, "OTONIO"),
-
-    ("Chocolate Navideño", cat_bebidas_c, "Chocolate con especias", 4.50, 4,
-     {"canela": 0.2}, "INVIERNO"),
-
-    ("Helado de Vainilla Especial", cat_postres, "Helado artesanal", 4.00, 2,
-     {"topping_chispas": 0.5}, "VERANO"),
-]
-
-for name, cat, desc, price, prep, extras, season in productos_temp:
-    Product.objects.get_or_create(
-        name=name,
-        category=cat,
-        defaults={
-            "description": desc,
-            "base_price": price,
-            "preparation_time": prep,
-            "available_extras": extras,
-            "season": season
-        }
-    )
-
-print("✓ Productos de temporada creados")
-
-
-# ==========================================================
-# 5. ESTACIONES DE COCINA
-# ==========================================================
-print("\n5) Creando estaciones de cocina...\n")
-
-stations = [
-    ("Estación Bebidas Calientes", "BEBIDAS_CALIENTES", ["BEBIDAS"]),
-    ("Estación Bebidas Frías", "BEBIDAS_FRIAS", ["BEBIDAS"]),
-    ("Panadería", "PANADERIA", ["ENTRADAS"]),
-    ("Cocina Principal", "COCINA", ["COMIDAS"]),
-    ("Repostería", "POSTRES", ["POSTRES"]),
+# La salida se acumula y se escribe una sola vez al final
+output = [
+    "=" * 60,
+    " Inicializando datos del sistema Cafetería del Bosque ",
+    "=" * 60,
 ]
 
-for name, stype, handled in stations:
-    KitchenStation.objects.get_or_create(
-        name=name,
-        defaults={"station_type": stype, "can_handle_categories": handled}
-    )
+# Si ya están el primer producto y la última estación, el seed se corrió antes: no hay nada que crear
+SEED_PRESENT = (
+    Product.objects.filter(name="Café Americano").exists()
+    and KitchenStation.objects.filter(name="Repostería").exists()
+)
 
-print("✓ Estaciones creadas")
-
-print("\n" + "=" * 60)
-print("✓ Inicialización completada exitosamente")
-print("=" * 60)
-print("\nCredenciales de prueba:")
-print("• Admin: admin / admin123")
-print("• Meseros: maria_mesera | juan_mesero — clave: mesero123")
-print("• Cocineros: carlos_chef | laura_chef — clave: chef123")
-print("• Clientes: ana_cliente | pedro_cliente | sofia_cliente — clave: cliente123")
-print("\nAdmin panel: http://localhost:8000/admin/")
+if SEED_PRESENT:
+    output.append("\n✓ Los datos de prueba ya existen, no se crea nada")
+else:
+    seed = {model: [] for model in (User, Category, Product, KitchenStation)}
+    with open(FIXTURE, encoding="utf-8") as fixture:
+        for deserialized in serializers.deserialize("json", fixture):
+            seed[type(deserialized.object)].append(deserialized.object)
+
+    # Los productos apuntan a la pk de su categoría en el fixture; se resuelven por nombre
+    category_names = {category.pk: category.name for category in seed[Category]}
+    for obj in seed[Category] + seed[Product] + seed[KitchenStation]:
+        obj.pk = None
+
+    # Todo en una sola transacción: un único commit al final
+    with transaction.atomic():
+        # Los usuarios se buscan por username: los que ya existen no se tocan
+        bulk_create_missing(User, seed[User], key="username")
+        bulk_create_missing(Category, seed[Category])
+
+        cats = {cat.name: cat for cat in Category.objects.filter(name__in=category_names.values())}
+        for product in seed[Product]:
+            product.category = cats[category_names[product.category_id]]
+
+        bulk_create_missing(Product, seed[Product])
+        bulk_create_missing(KitchenStation, seed[KitchenStation])
+
+    output += [
+        "\n✓ Usuarios, categorías, productos y estaciones faltantes creados",
+        "\n" + "=" * 60,
+        "✓ Inicialización completada exitosamente",
+        "=" * 60,
+        "\nCredenciales de prueba:",
+        "• Admin: admin / admin123",
+        "• Meseros: maria_mesera | juan_mesero — clave: mesero123",
+        "• Cocineros: carlos_chef | laura_chef — clave: chef123",
+        "• Clientes: ana_cliente | pedro_cliente | sofia_cliente — clave: cliente123",
+        "\nAdmin panel: http://localhost:8000/admin/",
+    ]
+
+print("\n".join(output))
@@ -1,35 +1,45 @@
 """
 Tests para todos los patrones de diseño implementados
 """
+import io
+from contextlib import redirect_stdout
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError
 from django.test import TestCase
 from apps.users.models import User
 from apps.menu.models import Category, Product
-from apps.orders.models import Order, OrderItem
+from apps.orders.models import Order, OrderItem, OrderHistory
 from apps.kitchen.models import KitchenStation
 from apps.orders.services import OrderService
 from apps.orders.patterns.builder import OrderBuilder
 from apps.orders.patterns.factory import get_order_factory
 from apps.orders.patterns.state import OrderStateManager
 from apps.orders.patterns.command import CreateOrderCommand, CommandInvoker
-from apps.orders.patterns.memento import get_caretaker, OrderOriginator
+from apps.orders.patterns.memento import get_caretaker, OrderOriginator, OrderCaretaker, OrderMemento
+from apps.orders import history_buffer
 from apps.kitchen.handlers import KitchenRouter
 from apps.core.config import get_config
 from apps.core.cache_proxy import MenuProxy
 from apps.core.facade import CafeteriaFacade
-from apps.notifications.services import NotificationService
-from apps.notifications.strategies import NotificationManager
+from apps.notifications.services import NotificationService, KitchenObserver, Observer
+from apps.notifications.strategies import NotificationManager, TokenBucket, InAppNotificationStrategy
+from apps.notifications.models import InAppNotification
 from apps.menu.services import get_menu_factory
 
 
 class FactoryPatternTest(TestCase):
     """Tests para Factory Method"""
 
-    def setUp(self):
-        self.customer = User.objects.create(username='test_customer', role='CLIENTE')
-        self.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.product = Product.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(username='test_customer', role='CLIENTE')
+        cls.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.category,
+            category=cls.category,
             base_price=3.50,
             preparation_time=5
         )
@@ -57,13 +67,14 @@ class FactoryPatternTest(TestCase):
 class BuilderPatternTest(TestCase):
     """Tests para Builder Pattern"""
 
-    def setUp(self):
-        self.customer = User.objects.create(username='builder_test', role='CLIENTE')
-        self.mesero = User.objects.create(username='mesero_test', role='MESERO')
-        self.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.product = Product.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(username='builder_test', role='CLIENTE')
+        cls.mesero = User.objects.create(username='mesero_test', role='MESERO')
+        cls.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.category,
+            category=cls.category,
             base_price=3.50,
             preparation_time=5,
             available_extras={'leche': 0.5}
@@ -102,15 +113,19 @@ class SingletonPatternTest(TestCase):
 class StatePatternTest(TestCase):
     """Tests para State Pattern"""
 
-    def setUp(self):
-        self.customer = User.objects.create(username='state_test', role='CLIENTE')
-        self.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.product = Product.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(username='state_test', role='CLIENTE')
+        cls.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.category,
-            base_price=3.50,
+            category=cls.category,
+            base_price=Decimal('3.50'),
             preparation_time=5
         )
+
+    def setUp(self):
+        # La orden cambia de estado en cada test
         self.order = Order.objects.create(
             customer=self.customer,
             table_number=5
@@ -140,16 +155,33 @@ class StatePatternTest(TestCase):
         self.order.refresh_from_db()
         self.assertEqual(self.order.status, 'ENTREGADO')
 
+    def test_snapshot_waits_for_commit(self):
+        """Test el snapshot y la notificación esperan a que la transacción confirme"""
+        caretaker = get_caretaker()
+        caretaker.clear_history(self.order.id)
+        self.addCleanup(caretaker.clear_history, self.order.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            OrderStateManager.advance_order(self.order)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(caretaker.get_by_tag(self.order.id, 'in_preparation'))
+
+        with redirect_stdout(io.StringIO()):
+            callbacks[0]()
+        self.assertIsNotNone(caretaker.get_by_tag(self.order.id, 'in_preparation'))
+
 
 class CommandPatternTest(TestCase):
     """Tests para Command Pattern"""
 
-    def setUp(self):
-        self.customer = User.objects.create(username='command_test', role='CLIENTE')
-        self.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.product = Product.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(username='command_test', role='CLIENTE')
+        cls.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.category,
+            category=cls.category,
             base_price=3.50,
             preparation_time=5
         )
@@ -185,19 +217,107 @@ class CommandPatternTest(TestCase):
 
         self.assertFalse(Order.objects.filter(id=order_id).exists())
 
+    def _create_command(self, table_number):
+        return CreateOrderCommand(
+            customer=self.customer,
+            table_number=table_number,
+            items=[{'product_id': self.product.id, 'quantity': 1, 'extras': {}}]
+        )
+
+    def test_undo_redo_after_eviction(self):
+        """Test undo/redo cuando el historial acotado descarta el comando más antiguo"""
+        invoker = CommandInvoker(max_history=2)
+        commands = [self._create_command(table) for table in (1, 2, 3)]
+        orders = [invoker.execute_command(command) for command in commands]
+
+        # El primero salió del historial y soltó sus instancias
+        self.assertEqual(len(invoker.get_history()), 2)
+        self.assertIsNone(commands[0].order)
+        self.assertEqual(commands[0].order_id, orders[0].id)
+
+        # Solo se deshacen los dos que siguen en el historial
+        self.assertTrue(invoker.undo())
+        self.assertTrue(invoker.undo())
+        self.assertFalse(invoker.undo())
+        self.assertEqual(
+            list(Order.objects.filter(customer=self.customer).values_list('id', flat=True)),
+            [orders[0].id]
+        )
+
+        # Rehacer vuelve a crear las órdenes en el mismo orden
+        self.assertTrue(invoker.redo())
+        self.assertTrue(invoker.redo())
+        self.assertFalse(invoker.redo())
+        self.assertEqual(
+            sorted(Order.objects.filter(customer=self.customer).values_list('table_number', flat=True)),
+            [1, 2, 3]
+        )
+
+    def test_new_command_clears_redo(self):
+        """Test un comando nuevo descarta lo que se podía rehacer"""
+        invoker = CommandInvoker()
+        invoker.execute_command(self._create_command(1))
+        invoker.undo()
+        self.assertEqual(len(invoker.get_redo_stack()), 1)
+
+        invoker.execute_command(self._create_command(2))
+
+        self.assertEqual(invoker.get_redo_stack(), [])
+        self.assertFalse(invoker.redo())
+
+
+class HistoryBufferTest(TestCase):
+    """Tests para el buffer de escritura del historial"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(username='history_test', role='CLIENTE')
+        cls.order = Order.objects.create(customer=cls.customer, table_number=5)
+
+    def test_flush_writes_pending_entries(self):
+        """Test flush inserta lo encolado y deja la cola vacía"""
+        # Se encola sin submit() para no iniciar el hilo escritor
+        for action in ('BUFFER_A', 'BUFFER_B'):
+            history_buffer._queue.put(OrderHistory(order=self.order, action=action))
+
+        history_buffer.flush()
+
+        self.assertEqual(
+            sorted(OrderHistory.objects.filter(order=self.order).values_list('action', flat=True)),
+            ['BUFFER_A', 'BUFFER_B']
+        )
+        self.assertTrue(history_buffer._queue.empty())
+
+    def test_flush_requeues_batch_when_db_fails(self):
+        """Test si la BD no responde el lote vuelve a la cola en lugar de perderse"""
+        history_buffer._queue.put(OrderHistory(order=self.order, action='BUFFER_RETRY'))
+
+        with mock.patch.object(OrderHistory.objects, 'bulk_create', side_effect=OperationalError('bd caída')):
+            history_buffer.flush()
+
+        self.assertFalse(history_buffer._queue.empty())
+
+        history_buffer.flush()
+        self.assertTrue(OrderHistory.objects.filter(order=self.order, action='BUFFER_RETRY').exists())
+        self.assertTrue(history_buffer._queue.empty())
+
 
 class MementoPatternTest(TestCase):
     """Tests para Memento Pattern"""
 
-    def setUp(self):
-        self.customer = User.objects.create(username='memento_test', role='CLIENTE')
-        self.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.product = Product.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(username='memento_test', role='CLIENTE')
+        cls.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.category,
+            category=cls.category,
             base_price=3.50,
             preparation_time=5
         )
+
+    def setUp(self):
+        # La orden se modifica y restaura en cada test
         self.order = Order.objects.create(
             customer=self.customer,
             table_number=5,
@@ -221,27 +341,69 @@ class MementoPatternTest(TestCase):
 
         self.assertEqual(self.order.status, 'PENDIENTE')
 
+    def test_memento_pool_reuse(self):
+        """Test un memento liberado vuelve al pool y se reutiliza limpio"""
+        memento = OrderMemento.acquire(1, 'PENDIENTE', 10, [{'product_id': 1}], {'tag': 'a'})
+        memento.release()
+        self.assertIsNone(memento.get_metadata())
+
+        reused = OrderMemento.acquire(2, 'LISTO', 20, [])
+
+        self.assertIs(reused, memento)
+        self.assertEqual(reused.get_order_id(), 2)
+        self.assertEqual(reused.get_status(), 'LISTO')
+        self.assertEqual(reused.get_items(), [])
+        self.assertEqual(reused.get_metadata(), {})
+        self.assertTrue(reused.is_valid())
+
+    def test_caretaker_tags_and_compression(self):
+        """Test el límite por orden descarta el tag más antiguo y comprime los no recientes"""
+        # bulk_create no pasa por save(): precios y subtotal van explícitos
+        OrderItem.objects.bulk_create([
+            OrderItem(order=self.order, product=self.product, quantity=2,
+                      unit_price=Decimal('3.50'), subtotal=Decimal('7.00')),
+        ])
+        caretaker = OrderCaretaker(max_snapshots_per_order=2)
+
+        for tag, order_status in (('a', 'PENDIENTE'), ('b', 'EN_PREPARACION'), ('c', 'LISTO')):
+            self.order.status = order_status
+            caretaker.save(self.order, tag=tag)
+
+        self.assertIsNone(caretaker.get_by_tag(self.order.id, 'a'))
+        self.assertEqual([entry['tag'] for entry in caretaker.get_history(self.order.id)], ['b', 'c'])
+
+        # 'b' quedó comprimido pero conserva sus items
+        snapshot = caretaker.get_by_tag(self.order.id, 'b')
+        self.assertEqual(snapshot['status'], 'EN_PREPARACION')
+        self.assertEqual(len(snapshot['items']), 1)
+        self.assertEqual(snapshot['items'][0]['quantity'], 2)
+
+        caretaker.restore(self.order, tag='b')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'EN_PREPARACION')
+
 
 class ChainOfResponsibilityTest(TestCase):
     """Tests para Chain of Responsibility"""
 
-    def setUp(self):
-        self.customer = User.objects.create(username='chain_test', role='CLIENTE')
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(username='chain_test', role='CLIENTE')
 
         # Crear categorías
-        self.cat_bebidas = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.cat_comidas = Category.objects.create(name='Comidas', category_type='COMIDAS')
+        cls.cat_bebidas = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.cat_comidas = Category.objects.create(name='Comidas', category_type='COMIDAS')
 
         # Crear productos
-        self.cafe = Product.objects.create(
+        cls.cafe = Product.objects.create(
             name='Café Caliente',
-            category=self.cat_bebidas,
+            category=cls.cat_bebidas,
             base_price=3.50,
             preparation_time=5
         )
-        self.sandwich = Product.objects.create(
+        cls.sandwich = Product.objects.create(
             name='Sandwich',
-            category=self.cat_comidas,
+            category=cls.cat_comidas,
             base_price=8.00,
             preparation_time=10
         )
@@ -258,10 +420,16 @@ class ChainOfResponsibilityTest(TestCase):
             can_handle_categories=['COMIDAS']
         )
 
-        # Crear orden
+    def setUp(self):
+        # El enrutamiento asigna los items de la orden en cada test
         self.order = Order.objects.create(customer=self.customer, table_number=5)
-        OrderItem.objects.create(order=self.order, product=self.cafe, quantity=1)
-        OrderItem.objects.create(order=self.order, product=self.sandwich, quantity=1)
+        # bulk_create no pasa por save(): precios y subtotal van explícitos
+        OrderItem.objects.bulk_create([
+            OrderItem(order=self.order, product=self.cafe, quantity=1,
+                      unit_price=Decimal('3.50'), subtotal=Decimal('3.50')),
+            OrderItem(order=self.order, product=self.sandwich, quantity=1,
+                      unit_price=Decimal('8.00'), subtotal=Decimal('8.00')),
+        ])
 
     def test_route_to_stations(self):
         """Test enrutamiento a estaciones"""
@@ -274,17 +442,18 @@ class ChainOfResponsibilityTest(TestCase):
 class ObserverPatternTest(TestCase):
     """Tests para Observer Pattern"""
 
-    def setUp(self):
-        self.mesero = User.objects.create(username='observer_mesero', role='MESERO')
-        self.customer = User.objects.create(username='observer_customer', role='CLIENTE')
-        self.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.product = Product.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.mesero = User.objects.create(username='observer_mesero', role='MESERO')
+        cls.customer = User.objects.create(username='observer_customer', role='CLIENTE')
+        cls.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.category,
+            category=cls.category,
             base_price=3.50,
             preparation_time=5
         )
-        self.order = Order.objects.create(customer=self.customer, table_number=5)
+        cls.order = Order.objects.create(customer=cls.customer, table_number=5)
 
     def test_register_waiter_observer(self):
         """Test registro de mesero como observer"""
@@ -296,19 +465,75 @@ class ObserverPatternTest(TestCase):
         notifications = NotificationService.get_kitchen_notifications()
         self.assertGreater(len(notifications), 0)
 
+    def test_kitchen_observer_ring_buffer(self):
+        """Test la cocina guarda solo las últimas MAX_NOTIFICATIONS"""
+        observer = KitchenObserver('test_kitchen')
+        limit = KitchenObserver.MAX_NOTIFICATIONS
+
+        with redirect_stdout(io.StringIO()):
+            for order_id in range(limit + 5):
+                observer.update(None, 'NEW_ORDER', {'order_id': order_id, 'table': 1, 'items_count': 1})
+
+        notifications = observer.get_notifications()
+        self.assertEqual(len(notifications), limit)
+        self.assertEqual(notifications[0]['data']['order_id'], 5)
+        self.assertEqual(observer.get_unread_count(), limit)
+
+        # Las descartadas ya no cuentan; las guardadas sí
+        observer.mark_as_read(0)
+        self.assertEqual(observer.get_unread_count(), limit)
+        observer.mark_as_read(notifications[0]['id'])
+        self.assertEqual(observer.get_unread_count(), limit - 1)
+
+    def test_gc_keeps_customers_with_open_orders(self):
+        """Test el barrido solo desregistra clientes expirados sin órdenes abiertas"""
+        NotificationService.register_customer(self.customer)
+        self.addCleanup(NotificationService.unregister_customer, self.customer)
+
+        observer = NotificationService._customer_observers[self.customer.id]
+        observer.attached_at -= Observer.TTL + 1
+
+        # La orden PENDIENTE de setUpTestData lo mantiene registrado
+        self.assertEqual(NotificationService._gc_sweep(), 0)
+        self.assertIn(self.customer.id, NotificationService._customer_observers)
+
+        Order.objects.filter(customer=self.customer).update(status='ENTREGADO')
+
+        self.assertEqual(NotificationService._gc_sweep(), 1)
+        self.assertNotIn(self.customer.id, NotificationService._customer_observers)
+
+    def test_delivery_keeps_customers_with_other_open_orders(self):
+        """Test la entrega solo desregistra al cliente sin otras órdenes abiertas"""
+        NotificationService.register_customer(self.customer)
+        self.addCleanup(NotificationService.unregister_customer, self.customer)
+
+        other = Order.objects.create(customer=self.customer, table_number=6)
+
+        NotificationService.notify_order_delivered(self.order)
+        self.assertIn(self.customer.id, NotificationService._customer_observers)
+
+        Order.objects.filter(pk=self.order.pk).update(status='ENTREGADO')
+        NotificationService.notify_order_delivered(other)
+        self.assertNotIn(self.customer.id, NotificationService._customer_observers)
+
 
 class ProxyPatternTest(TestCase):
     """Tests para Proxy Pattern"""
 
-    def setUp(self):
-        self.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.product = Product.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.category,
+            category=cls.category,
             base_price=3.50,
             preparation_time=5
         )
 
+    def setUp(self):
+        # El test verifica la carga inicial desde BD
+        cache.clear()
+
     def test_menu_proxy_cache(self):
         """Test cache del menú"""
         proxy = MenuProxy()
@@ -329,16 +554,23 @@ class ProxyPatternTest(TestCase):
 class FacadePatternTest(TestCase):
     """Tests para Facade Pattern"""
 
-    def setUp(self):
-        self.customer = User.objects.create(username='facade_customer', role='CLIENTE')
-        self.mesero = User.objects.create(username='facade_mesero', role='MESERO')
-        self.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
-        self.product = Product.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(username='facade_customer', role='CLIENTE')
+        cls.mesero = User.objects.create(username='facade_mesero', role='MESERO')
+        cls.category = Category.objects.create(name='Bebidas', category_type='BEBIDAS')
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.category,
-            base_price=3.50,
+            category=cls.category,
+            base_price=Decimal('3.50'),
             preparation_time=5
         )
+        cls.tea = Product.objects.create(
+            name='Té',
+            category=cls.category,
+            base_price=Decimal('2.50'),
+            preparation_time=3
+        )
 
         KitchenStation.objects.create(
             name='Bebidas Calientes',
@@ -360,6 +592,26 @@ class FacadePatternTest(TestCase):
         self.assertTrue(result['success'])
         self.assertIn('order', result)
 
+    def test_facade_edit_order_replaces_items(self):
+        """Test editar orden: la respuesta y el snapshot reflejan los items nuevos"""
+        facade = CafeteriaFacade()
+        order = Order.objects.create(customer=self.customer, table_number=5)
+        OrderItem.objects.create(order=order, product=self.product, quantity=1)
+        self.addCleanup(facade.caretaker.clear_history, order.id)
+
+        with redirect_stdout(io.StringIO()):
+            result = facade.editar_orden(order.id, new_items=[
+                {'product_id': self.tea.id, 'quantity': 1},
+                {'product_id': self.tea.id, 'quantity': 2},
+            ])
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['items_count'], 2)
+        self.assertEqual(order.items.count(), 2)
+
+        snapshot = facade.caretaker.get_by_tag(order.id, 'after_edit')
+        self.assertEqual([item['product_name'] for item in snapshot['items']], ['Té', 'Té'])
+
 
 class StrategyPatternTest(TestCase):
     """Tests para Strategy Pattern"""
@@ -375,23 +627,62 @@ class StrategyPatternTest(TestCase):
         self.assertTrue(result['success'])
         self.assertEqual(result['type'], 'console')
 
+    def test_in_app_flush_keeps_batch_on_error(self):
+        """Test un bulk_create fallido devuelve el lote al buffer y el siguiente flush lo guarda"""
+        pending = [InAppNotification(recipient='cliente', message=f'm{i}') for i in range(3)]
+        with InAppNotificationStrategy._lock:
+            saved_buffer = InAppNotificationStrategy._buffer
+            InAppNotificationStrategy._buffer = list(pending)
+
+        def restore():
+            with InAppNotificationStrategy._lock:
+                InAppNotificationStrategy._buffer = saved_buffer
+        self.addCleanup(restore)
+
+        with mock.patch.object(InAppNotification.objects, 'bulk_create', side_effect=RuntimeError('bd caída')):
+            with self.assertRaises(RuntimeError):
+                InAppNotificationStrategy.flush()
+
+        self.assertEqual(InAppNotificationStrategy._buffer, pending)
+        self.assertEqual(InAppNotificationStrategy.flush(), 3)
+        self.assertEqual(InAppNotification.objects.count(), 3)
+
+    def test_token_bucket_limit_and_refill(self):
+        """Test el token bucket limita ráfagas y recarga con el tiempo sin pasar su capacidad"""
+        bucket = TokenBucket(capacity=2, refill_rate=1.0)
+
+        self.assertTrue(bucket.consume())
+        self.assertTrue(bucket.consume())
+        self.assertFalse(bucket.consume())
+
+        # Un segundo después hay un token más
+        bucket.last_refill -= 1.0
+        self.assertTrue(bucket.consume())
+        self.assertFalse(bucket.consume())
+
+        # Tras mucho tiempo la recarga no pasa de la capacidad
+        bucket.last_refill -= 100.0
+        self.assertTrue(bucket.consume(2))
+        self.assertFalse(bucket.consume())
+
 
 class CompositePatternTest(TestCase):
     """Tests para Composite Pattern"""
 
-    def setUp(self):
-        self.parent_category = Category.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent_category = Category.objects.create(
             name='Bebidas',
             category_type='BEBIDAS'
         )
-        self.child_category = Category.objects.create(
+        cls.child_category = Category.objects.create(
             name='Bebidas Calientes',
             category_type='BEBIDAS',
-            parent=self.parent_category
+            parent=cls.parent_category
         )
-        self.product = Product.objects.create(
+        cls.product = Product.objects.create(
             name='Café',
-            category=self.child_category,
+            category=cls.child_category,
             base_price=3.50,
             preparation_time=5
         )